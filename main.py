@@ -1,7 +1,10 @@
 import sys
 import os
+import json
+import time
 from argparse import ArgumentParser
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from rich.progress import Progress
 from utils.video_handler import (
     find_video_files,
@@ -9,9 +12,27 @@ from utils.video_handler import (
     embed_subtitle,
     extract_subtitles,
 )
-from utils.subtitle_handler import translate_subtitle
-from utils.file_utils import is_video_file
-from utils.deepseek import DeepSeekTranslator
+from utils.subtitle_handler import (
+    find_subtitle_files,
+    translate_subtitle,
+    translate_subtitle_group,
+)
+from utils.file_utils import is_subtitle_file, is_video_file
+from utils.deepseek import DeepSeekTranslator, TranslatorSession, load_config
+from utils.estimator import estimate_library
+from utils.batch_api import (
+    MAX_BATCH_REQUESTS,
+    apply_video_results,
+    build_library_requests,
+    download_results,
+    missing_requests,
+    read_requests,
+    submit_requests,
+    wait_for_batch,
+)
+from utils.profiler import profiler
+from utils.work_lease import LeaseStore
+from utils.service import serve
 
 arg_parser = ArgumentParser(description="Process video files for subtitle translation.")
 arg_parser.add_argument(
@@ -53,6 +74,107 @@ arg_parser.add_argument(
     help="Embed translated subtitles into video.",
     default=False,
 )
+arg_parser.add_argument(
+    "--profile",
+    dest="profile",
+    nargs="?",
+    const="deepsub_trace.json",
+    type=str,
+    help="Record per-stage timings, write a Chrome trace JSON (default: deepsub_trace.json) and print a summary at exit.",
+    default=None,
+)
+arg_parser.add_argument(
+    "--distributed",
+    action="store_true",
+    help="Share the library with other workers by claiming videos through lease files.",
+    default=False,
+)
+arg_parser.add_argument(
+    "--lease_dir",
+    dest="lease_dir",
+    type=str,
+    help="Lease directory on the shared filesystem (default: <path>/.deepsub_leases).",
+    default="",
+)
+arg_parser.add_argument(
+    "--lease_ttl",
+    dest="lease_ttl",
+    type=float,
+    help="Seconds without heartbeat before another worker may reclaim a video (default: 300).",
+    default=300.0,
+)
+arg_parser.add_argument(
+    "--hedge",
+    action="store_true",
+    help="Send a duplicate request when an API call runs past the latency percentile set in the config's hedge section.",
+    default=False,
+)
+arg_parser.add_argument(
+    "--estimate",
+    action="store_true",
+    help="Dry run: report expected tokens, requests and time per file without calling the API.",
+    default=False,
+)
+arg_parser.add_argument(
+    "--bulk",
+    action="store_true",
+    help="Submit the whole library as offline jobs through the batch API, wait for them and apply the results.",
+    default=False,
+)
+arg_parser.add_argument(
+    "--bulk_manifest",
+    dest="bulk_manifest",
+    type=str,
+    help="Resume waiting for a submitted --bulk job from its manifest file.",
+    default="",
+)
+arg_parser.add_argument(
+    "--bulk_limit",
+    dest="bulk_limit",
+    type=int,
+    help="Most requests per --bulk batch job, larger libraries are split into several jobs (default: 50000).",
+    default=MAX_BATCH_REQUESTS,
+)
+arg_parser.add_argument(
+    "--bulk_poll",
+    dest="bulk_poll",
+    type=float,
+    help="Seconds between batch status checks (default: 60).",
+    default=60.0,
+)
+arg_parser.add_argument(
+    "--subtitles",
+    action="store_true",
+    help="Translate sidecar .srt/.ass files instead of video files, writing <name>.<target_track>.<ext> next to them.",
+    default=False,
+)
+arg_parser.add_argument(
+    "--serve",
+    action="store_true",
+    help="Run a local HTTP translation service with a shared warm client, a result cache and request coalescing.",
+    default=False,
+)
+arg_parser.add_argument(
+    "--host",
+    dest="host",
+    type=str,
+    help="Address the --serve service binds to (default: 127.0.0.1).",
+    default="127.0.0.1",
+)
+arg_parser.add_argument(
+    "--port",
+    dest="port",
+    type=int,
+    help="Port of the --serve service (default: 8765).",
+    default=8765,
+)
+arg_parser.add_argument(
+    "--workers",
+    dest="workers",
+    type=int,
+    help="Worker processes for --estimate, parallel series for --subtitles or concurrent translations for --serve (default: CPU count, 4 for --serve).",
+    default=0,
+)
 
 
 def clean_files(files: list[str | Path]) -> None:
@@ -70,8 +192,35 @@ def process_video(
     target_track: str,
     batch_size: int,
     embed: bool,
+    session: TranslatorSession,
+    progress_task,
+    progress: Progress,
+    lease_check=None,
+):
+    with profiler.span("process_video", file=file_path.name):
+        _process_video(
+            file_path,
+            source_track,
+            target_track,
+            batch_size,
+            embed,
+            session,
+            progress_task,
+            progress,
+            lease_check,
+        )
+
+
+def _process_video(
+    file_path: Path,
+    source_track: str,
+    target_track: str,
+    batch_size: int,
+    embed: bool,
+    session: TranslatorSession,
     progress_task,
     progress: Progress,
+    lease_check=None,
 ):
     assert isinstance(file_path, Path), "file_path must be Path object"
     assert file_path.exists(), "file_path does not exist"
@@ -95,37 +244,57 @@ def process_video(
     progress.update(
         progress_task, description=f"[yellow]⏳ Starting translation: {file_path.name}"
     )
-    dst = DeepSeekTranslator()
+    dst = session.translator()
 
     progress.update(
         progress_task, description=f"[yellow]⏳ Extracting subtitles: {file_path.name}"
     )
     clean_list = []
 
-    source_subs = extract_subtitles(file_path, source_track)
+    with profiler.span("extract_subtitles", file=file_path.name, track=source_track):
+        source_subs = extract_subtitles(file_path, source_track)
     clean_list += [e[0] for e in source_subs]
 
     translated_subs = []
 
+    def lease_lost() -> bool:
+        # Another worker reclaimed the video, leave its outputs alone
+        if lease_check is None or lease_check():
+            return False
+        progress.update(
+            progress_task,
+            advance=1,
+            description=f"[red]✗ Lease lost, giving up: {file_path.name}",
+        )
+        return True
+
     for i, sub_info in enumerate(source_subs):
         # sub_info[0] = subtitle_path
         # sub_info[1] = subtitle_title
+        if lease_lost():
+            return
         progress.update(
             progress_task,
             description=f"[yellow]⏳ Translating ({i + 1}/{len(source_subs)}): {file_path.name}",
         )
-        translated_sub = translate_subtitle(
-            sub_info[0],
-            dst,
-            progress_task,
-            progress,
-            output_path=str(file_path.with_suffix(sub_info[0].suffix)),
-            batch_size=batch_size,
-        )
+        with profiler.span(
+            "translate_subtitle", file=file_path.name, track=sub_info[1]
+        ):
+            translated_sub = translate_subtitle(
+                sub_info[0],
+                dst,
+                progress_task,
+                progress,
+                output_path=str(file_path.with_suffix(sub_info[0].suffix)),
+                batch_size=batch_size,
+            )
         translated_subs.append((translated_sub, sub_info[1], target_track))
         if embed:
             clean_list.append(translated_sub)
 
+    if lease_lost():
+        return
+
     if embed:
         progress.update(
             progress_task,
@@ -146,36 +315,300 @@ def process_video(
     )
 
 
+def check_args(args) -> None:
+    """Reject conflicting mode flags and flags the chosen mode would ignore."""
+    modes = [
+        flag
+        for flag, enabled in [
+            ("--serve", args.serve),
+            ("--subtitles", args.subtitles),
+            ("--estimate", args.estimate),
+            ("--bulk", args.bulk or args.bulk_manifest),
+            ("--distributed", args.distributed),
+        ]
+        if enabled
+    ]
+    if len(modes) > 1:
+        arg_parser.error(f"{' and '.join(modes)} can't be used together.")
+    # Flags a mode would otherwise ignore without a word
+    ignored = [
+        ("--hedge", args.hedge, "--estimate", args.estimate),
+        ("--hedge", args.hedge, "--bulk", args.bulk or args.bulk_manifest),
+        ("--embed", args.embed, "--subtitles", args.subtitles),
+        ("--profile", args.profile, "--serve", args.serve),
+    ]
+    for flag, flag_set, mode, mode_set in ignored:
+        if flag_set and mode_set:
+            arg_parser.error(f"{flag} has no effect with {mode}.")
+
+
 def main():
     args = arg_parser.parse_args()
+    check_args(args)
+    if args.serve:
+        serve(
+            args.host,
+            args.port,
+            args.workers or 4,
+            TranslatorSession(hedge=args.hedge),
+        )
+        return
+
     video_files = []
     input_path = Path(args.path).resolve()
     assert input_path.exists(), "Path does not exist."
 
-    if input_path.is_file() and is_video_file(input_path):
-        video_files = [input_path]
-    elif input_path.is_dir():
-        video_files = find_video_files(input_path)
+    if args.subtitles:
+        if input_path.is_file() and is_subtitle_file(input_path):
+            subtitle_groups = {input_path.parent: [input_path]}
+        elif input_path.is_dir():
+            subtitle_groups = find_subtitle_files(
+                input_path, args.source_track, args.target_track
+            )
+        else:
+            print("Error: Invalid path or unsupported file.")
+            sys.exit(1)
+
+        if not subtitle_groups:
+            print("Error: No subtitle files to translate found.")
+            sys.exit(1)
     else:
-        print("Error: Invalid path or unsupported file.")
-        sys.exit(1)
+        if input_path.is_file() and is_video_file(input_path):
+            video_files = [input_path]
+        elif input_path.is_dir():
+            video_files = find_video_files(input_path)
+        else:
+            print("Error: Invalid path or unsupported file.")
+            sys.exit(1)
 
-    if not video_files:
-        print("Error: No video files found.")
-        sys.exit(1)
+        if not video_files:
+            print("Error: No video files found.")
+            sys.exit(1)
 
-    with Progress() as progress:
-        task = progress.add_task("[cyan]Processing videos...", total=len(video_files))
-        for video_file in video_files:
-            process_video(
-                Path(video_file),
+    if args.profile:
+        profiler.enable()
+    try:
+        if args.subtitles:
+            run_subtitles(subtitle_groups, args)
+        elif args.estimate:
+            run_estimate(video_files, args)
+        elif args.bulk or args.bulk_manifest:
+            root = input_path if input_path.is_dir() else input_path.parent
+            run_bulk(video_files, args, root)
+        elif args.distributed:
+            root = input_path if input_path.is_dir() else input_path.parent
+            lease_dir = (
+                Path(args.lease_dir) if args.lease_dir else root / ".deepsub_leases"
+            )
+            with LeaseStore(lease_dir, root, ttl=args.lease_ttl) as leases:
+                run_videos(video_files, args, leases)
+        else:
+            run_videos(video_files, args)
+    finally:
+        if args.profile:
+            trace_path = profiler.write_chrome_trace(args.profile)
+            profiler.print_summary()
+            print(f"Trace written to {trace_path}")
+
+
+def run_subtitles(subtitle_groups: dict[Path, list[Path]], args) -> None:
+    total = sum(len(sub_paths) for sub_paths in subtitle_groups.values())
+    with TranslatorSession(hedge=args.hedge) as session, Progress() as progress:
+        task = progress.add_task("[cyan]Processing subtitles...", total=total)
+        with ThreadPoolExecutor(max_workers=args.workers or None) as pool:
+            futures = [
+                pool.submit(
+                    translate_subtitle_group,
+                    sub_paths,
+                    session.translator(),
+                    args.source_track,
+                    args.target_track,
+                    task,
+                    progress,
+                    batch_size=args.batch_size,
+                )
+                for sub_paths in subtitle_groups.values()
+            ]
+            for future in futures:
+                future.result()
+        if session.hedge is not None:
+            print(session.hedge.report())
+
+
+def run_estimate(video_files: list[Path], args) -> None:
+    config = load_config()
+    dst = DeepSeekTranslator(config=config)
+    estimate_library(
+        video_files,
+        args.source_track,
+        args.target_track,
+        args.batch_size,
+        dst.system_prompt,
+        dst.context_length,
+        config.get("estimate"),
+        args.workers,
+    )
+
+
+def run_bulk(video_files: list[Path], args, root: Path) -> None:
+    if args.batch_size == 1 and not args.bulk_manifest:
+        print(
+            "Warning: --bulk with -b 1 sends one request per subtitle line, "
+            "a larger --batch_size needs far fewer requests."
+        )
+    with TranslatorSession() as session:
+        if args.bulk_manifest:
+            manifest_path = Path(args.bulk_manifest)
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        else:
+            requests, videos = build_library_requests(
+                video_files,
                 args.source_track,
                 args.target_track,
                 args.batch_size,
-                args.embed,
+                session.translator(),
+            )
+            if not requests:
+                print("Nothing to translate.")
+                return
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            batches = submit_requests(
+                session.client,
+                requests,
+                root / f"deepsub_batch_{stamp}",
+                args.bulk_limit,
+            )
+            manifest = {
+                "batches": batches,
+                "batch_size": args.batch_size,
+                "target_track": args.target_track,
+                "videos": videos,
+                "results": {},
+            }
+            manifest_path = root / f"deepsub_batch_{stamp}.json"
+            save_manifest(manifest, manifest_path)
+            print(
+                f"Submitted {len(requests)} requests as {len(batches)} batches, "
+                f"resume with --bulk_manifest {manifest_path}"
+            )
+
+        # Results of earlier rounds for videos that were still missing some
+        results = dict(manifest.get("results", {}))
+        for entry in manifest["batches"]:
+            batch = wait_for_batch(session.client, entry["batch_id"], args.bulk_poll)
+            if batch.status not in ("completed", "expired"):
+                print(f"Error: batch {batch.id} ended with status {batch.status}.")
+            results.update(download_results(session.client, batch))
+        incomplete = [v for v in manifest["videos"] if missing_requests(v, results)]
+        if incomplete:
+            missing = [cid for v in incomplete for cid in missing_requests(v, results)]
+            retries = submit_requests(
+                session.client,
+                [
+                    request
+                    for entry in manifest["batches"]
+                    for request in read_requests(Path(entry["requests_file"]), missing)
+                ],
+                manifest_path.with_name(
+                    f"{manifest_path.stem}-retry-{time.strftime('%Y%m%d-%H%M%S')}"
+                ),
+                args.bulk_limit,
+            )
+            save_manifest(
+                {
+                    **manifest,
+                    "batches": retries,
+                    "videos": incomplete,
+                    "results": {
+                        cid: results[cid]
+                        for video in incomplete
+                        for track in video["tracks"]
+                        for cid in track["requests"]
+                        if cid in results
+                    },
+                },
+                manifest_path,
+            )
+            print(
+                f"{len(incomplete)} videos have {len(missing)} requests without "
+                f"results, resubmitted them as {len(retries)} batches, "
+                f"resume with --bulk_manifest {manifest_path}"
+            )
+
+    with Progress() as progress:
+        task = progress.add_task(
+            "[cyan]Applying batch results...", total=len(manifest["videos"])
+        )
+        for video in manifest["videos"]:
+            video_path = Path(video["video"])
+            if video in incomplete:
+                # Keep its extracted subtitles for the resubmitted batch
+                progress.update(
+                    task,
+                    advance=1,
+                    description=f"[yellow]Waiting for resubmitted requests: {video_path.name}",
+                )
+                continue
+            translated_subs = apply_video_results(
+                video,
+                results,
+                manifest["batch_size"],
+                manifest["target_track"],
                 task,
                 progress,
             )
+            clean_list = [track["subtitle"] for track in video["tracks"]]
+            if args.embed:
+                embed_subtitle(video_path, translated_subs)
+                clean_list += [sub[0] for sub in translated_subs]
+            clean_files(clean_list)
+            progress.update(
+                task,
+                advance=1,
+                description=f"[blue]✔ Translated{' & embedded' if args.embed else ''}: {video_path.name}",
+            )
+
+
+def save_manifest(manifest: dict, path: Path) -> None:
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def run_videos(video_files: list[Path], args, leases: LeaseStore | None = None) -> None:
+    with TranslatorSession(hedge=args.hedge) as session, Progress() as progress:
+        task = progress.add_task("[cyan]Processing videos...", total=len(video_files))
+        for video_file in video_files:
+            if leases is not None and not leases.claim(Path(video_file)):
+                progress.update(
+                    task,
+                    advance=1,
+                    description=f"[green]✓ Skipped (claimed or done by another worker): {Path(video_file).name}",
+                )
+                continue
+            done = False
+            try:
+                process_video(
+                    Path(video_file),
+                    args.source_track,
+                    args.target_track,
+                    args.batch_size,
+                    args.embed,
+                    session,
+                    task,
+                    progress,
+                    lease_check=(
+                        None
+                        if leases is None
+                        else lambda: leases.holds(Path(video_file))
+                    ),
+                )
+                done = True
+            finally:
+                if leases is not None:
+                    leases.release(Path(video_file), done=done)
+        if session.hedge is not None:
+            print(session.hedge.report())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+import json
+import threading
+import time
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock
+import pysubs2
+import pytest
+from openai import OpenAI
+from utils.batch_api import (
+    ReplayTranslator,
+    build_track_requests,
+    download_results,
+    missing_requests,
+    read_requests,
+    split_requests,
+    submit_batch,
+    submit_requests,
+    wait_for_batch,
+    write_requests,
+)
+from utils.subtitle_handler import translate_subtitle
+
+
+class StandInBatchServer(BaseHTTPRequestHandler):
+    """
+    Minimal OpenAI-compatible files/batches API that upper-cases every line.
+    Requests whose custom_id is in failing go to the batch's error file.
+    """
+
+    files = {}
+    batches = {}
+    failing = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload: dict | str):
+        body = payload if isinstance(payload, str) else json.dumps(payload)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def _file(self, file_id: str, content: str) -> dict:
+        self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": "batch",
+            "status": "processed",
+        }
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        if self.path.endswith("/files"):
+            # Keep only the JSONL lines of the multipart upload
+            lines = [l for l in body.splitlines() if l.startswith('{"custom_id"')]
+            self._send(self._file(f"file-{len(self.files)}", "\n".join(lines)))
+        elif self.path.endswith("/batches"):
+            request = json.loads(body)
+            output, errors = [], []
+            for line in self.files[request["input_file_id"]].splitlines():
+                record = json.loads(line)
+                if record["custom_id"] in self.failing:
+                    errors.append(
+                        json.dumps(
+                            {
+                                "custom_id": record["custom_id"],
+                                "response": {"status_code": 500, "body": {}},
+                                "error": {"code": "server_error"},
+                            }
+                        )
+                    )
+                    continue
+                parts = record["body"]["messages"][-1]["content"].split("\\n")
+                content = "\\n".join(part.upper() for part in parts)
+                output.append(
+                    json.dumps(
+                        {
+                            "custom_id": record["custom_id"],
+                            "response": {
+                                "status_code": 200,
+                                "body": {
+                                    "choices": [{"message": {"content": content}}]
+                                },
+                            },
+                            "error": None,
+                        }
+                    )
+                )
+            output_file = self._file(f"file-{len(self.files)}", "\n".join(output))
+            error_file = (
+                self._file(f"file-{len(self.files)}", "\n".join(errors))
+                if errors
+                else {"id": None}
+            )
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": request["endpoint"],
+                "completion_window": request["completion_window"],
+                "input_file_id": request["input_file_id"],
+                "output_file_id": output_file["id"],
+                "error_file_id": error_file["id"],
+                "created_at": int(time.time()),
+                "status": "completed",
+            }
+            self._send(self.batches[batch_id])
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts[-1] == "content":
+            self._send(self.files[parts[-2]])
+        elif parts[-2] == "batches":
+            self._send(self.batches[parts[-1]])
+
+
+@pytest.fixture
+def stand_in_client():
+    server = HTTPServer(("127.0.0.1", 0), StandInBatchServer)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1")
+    server.shutdown()
+    StandInBatchServer.failing.clear()
+
+
+def test_replay_translator_keeps_missing_results():
+    replay = ReplayTranslator(["สวัสดี\\nลาก่อน", None])
+    assert replay.translate(["Hello", "Bye"]) == ["สวัสดี", "ลาก่อน"]
+    assert replay.translate(["Unchanged"]) == ["Unchanged"]
+
+
+def _write_subtitle(sub_path):
+    subtitle = pysubs2.SSAFile()
+    for i, text in enumerate(["hello", "good bye", "see you"]):
+        subtitle.append(pysubs2.SSAEvent(start=i * 1000, end=i * 1000 + 900, text=text))
+    subtitle.save(str(sub_path))
+
+
+def test_bulk_round_trip(tmp_path, stand_in_client):
+    sub_path = tmp_path / "episode.srt"
+    _write_subtitle(sub_path)
+
+    dst = MagicMock(model="deepseek-chat", system_prompt="Translate.")
+    requests = build_track_requests(sub_path, dst, batch_size=2, prefix="0-0")
+    assert [r["custom_id"] for r in requests] == ["0-0-0", "0-0-1"]
+
+    batch = submit_batch(
+        stand_in_client, write_requests(requests, tmp_path / "requests.jsonl")
+    )
+    batch = wait_for_batch(stand_in_client, batch.id, poll_interval=0)
+    results = download_results(stand_in_client, batch)
+
+    replay = ReplayTranslator([results.get(r["custom_id"]) for r in requests])
+    output_path = translate_subtitle(
+        sub_path,
+        replay,
+        "task",
+        MagicMock(),
+        output_path=str(tmp_path / "translated.srt"),
+        batch_size=2,
+    )
+    translated = pysubs2.load(str(output_path))
+    assert [e.text for e in translated.events] == ["HELLO", "GOOD BYE", "SEE YOU"]
+
+
+def test_failed_requests_are_reported_and_resubmittable(tmp_path, stand_in_client):
+    sub_path = tmp_path / "episode.srt"
+    _write_subtitle(sub_path)
+    dst = MagicMock(model="deepseek-chat", system_prompt="Translate.")
+    requests = build_track_requests(sub_path, dst, batch_size=2, prefix="0-0")
+    requests_path = write_requests(requests, tmp_path / "requests.jsonl")
+    StandInBatchServer.failing.add("0-0-1")
+
+    batch = submit_batch(stand_in_client, requests_path)
+    batch = wait_for_batch(stand_in_client, batch.id, poll_interval=0)
+    results = download_results(stand_in_client, batch)
+
+    assert list(results) == ["0-0-0"]
+    video = {
+        "video": str(tmp_path / "episode.mkv"),
+        "tracks": [
+            {"subtitle": str(sub_path), "title": "", "requests": ["0-0-0", "0-0-1"]}
+        ],
+    }
+    missing = missing_requests(video, results)
+    assert missing == ["0-0-1"]
+    assert [r["custom_id"] for r in read_requests(requests_path, missing)] == missing
+
+
+def test_split_requests_respects_count_and_size_limits():
+    requests = [{"custom_id": f"0-0-{i}", "body": "x" * 100} for i in range(5)]
+    assert [len(c) for c in split_requests(requests, max_requests=2)] == [2, 2, 1]
+    assert [len(c) for c in split_requests(requests, 10, max_bytes=300)] == [2, 2, 1]
+
+
+def test_submit_requests_creates_one_batch_per_chunk(tmp_path, stand_in_client):
+    sub_path = tmp_path / "episode.srt"
+    _write_subtitle(sub_path)
+    dst = MagicMock(model="deepseek-chat", system_prompt="Translate.")
+    requests = build_track_requests(sub_path, dst, batch_size=1, prefix="0-0")
+
+    batches = submit_requests(stand_in_client, requests, tmp_path / "job", 2)
+
+    assert len(batches) == 2
+    assert [Path(b["requests_file"]).name for b in batches] == [
+        "job-0.jsonl",
+        "job-1.jsonl",
+    ]
+    results = {}
+    for entry in batches:
+        batch = wait_for_batch(stand_in_client, entry["batch_id"], poll_interval=0)
+        results.update(download_results(stand_in_client, batch))
+    assert results == {"0-0-0": "HELLO", "0-0-1": "GOOD BYE", "0-0-2": "SEE YOU"}
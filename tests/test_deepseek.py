@@ -1,6 +1,8 @@
+import asyncio
 import pytest
-from unittest.mock import patch, mock_open, MagicMock
-from utils.deepseek import DeepSeekTranslator
+from unittest.mock import patch, mock_open, MagicMock, AsyncMock
+from openai.types.chat import ChatCompletionMessage
+from utils.deepseek import DeepSeekTranslator, TranslatorSession
 
 
 # Sample YAML config content
@@ -80,3 +82,62 @@ def test_translate_success(mock_post, valid_translator):
     assert result == "สวัสดี"
     assert valid_translator.get_chat_history()[-1]["content"] == "สวัสดี"
     assert mock_post.called
+
+
+session_yaml = """
+api_key: test_api_key
+endpoint: https://api.deepseek.com
+model: deepseek-chat
+context_length: 1000
+system_prompt:
+  constraint: "Translate from {source_language} to {target_language}. "
+  description: "Be concise."
+  variables:
+    source_language: "English"
+    target_language: "Thai"
+"""
+
+
+@pytest.fixture
+def session():
+    with patch("builtins.open", mock_open(read_data=session_yaml)), patch(
+        "pathlib.Path.exists", return_value=True
+    ):
+        return TranslatorSession(config_path="fake_config.yml")
+
+
+def test_session_shares_clients(session):
+    with patch("builtins.open", side_effect=AssertionError("config re-read")):
+        first = session.translator()
+        second = session.translator()
+    assert first._client is second._client
+    # The async client only exists once an async translator is asked for
+    assert first._async_client is None
+    async_first, async_second = session.atranslator(), session.atranslator()
+    assert async_first._async_client is not None
+    assert async_first._async_client is async_second._async_client
+    first.update_chat_history({"role": "user", "content": "Hello"})
+    assert len(second.get_chat_history()) == 1
+
+
+def test_atranslate_success(session):
+    dst = session.atranslator()
+    response = MagicMock()
+    response.choices[0].message = ChatCompletionMessage(
+        role="assistant", content="สวัสดี\\nลาก่อน"
+    )
+    with patch.object(
+        dst._async_client.chat.completions,
+        "create",
+        new=AsyncMock(return_value=response),
+    ):
+        result = asyncio.run(dst.atranslate(["Hello", "Bye"]))
+    assert result == ["สวัสดี", "ลาก่อน"]
+    assert dst.get_chat_history()[-1]["role"] == "assistant"
+
+
+def test_atranslate_requires_session_async_client(session):
+    dst = session.translator()
+    with pytest.raises(RuntimeError, match="atranslator"):
+        asyncio.run(dst.atranslate("Hello"))
+    assert dst._async_client is None
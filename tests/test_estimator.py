@@ -0,0 +1,25 @@
+from utils.estimator import estimated_cost, simulate_translation
+
+
+def test_simulate_without_trimming_caches_previous_prompt():
+    totals = simulate_translation(10, [5, 5, 5], context_length=1000)
+    assert totals["requests"] == 3
+    # prompts: 10+5, 10+5+5+5, 10+5+5+5+5+5
+    assert totals["input_tokens"] == 15 + 25 + 35
+    # each prompt shares the whole previous prompt as prefix
+    assert totals["cached_tokens"] == 0 + 15 + 25
+    assert totals["output_tokens"] == 15
+
+
+def test_simulate_trimming_breaks_cache():
+    totals = simulate_translation(10, [20, 20], context_length=45)
+    # second prompt drops the first exchange, only the system prompt is shared
+    assert totals["input_tokens"] == 30 + 30
+    assert totals["cached_tokens"] == 10
+
+
+def test_estimated_cost_uses_cached_price():
+    result = {"input_tokens": 2_000_000, "cached_tokens": 1_000_000, "output_tokens": 0}
+    pricing = {"input": 1.0, "cached_input": 0.5, "output": 2.0}
+    assert estimated_cost(result, pricing) == 1.5
+    assert estimated_cost(result, {}) is None
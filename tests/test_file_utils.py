@@ -1,5 +1,5 @@
 from pathlib import Path
-from utils.file_utils import is_video_file
+from utils.file_utils import is_subtitle_file, is_video_file
 
 
 def test_is_video_file_true():
@@ -8,3 +8,8 @@ def test_is_video_file_true():
 
 def test_is_video_file_false():
     assert is_video_file(Path("test.txt")) is False
+
+
+def test_is_subtitle_file():
+    assert is_subtitle_file(Path("episode.en.SRT")) is True
+    assert is_subtitle_file(Path("episode.mkv")) is False
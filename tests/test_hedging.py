@@ -0,0 +1,125 @@
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+import openai
+from openai.types.chat import ChatCompletionMessage
+from utils.deepseek import DeepSeekTranslator
+from utils.hedging import HedgePolicy
+
+
+def warmed_policy(**kwargs) -> HedgePolicy:
+    policy = HedgePolicy(min_samples=5, **kwargs)
+    for _ in range(5):
+        policy.call(lambda: "ok", lambda: "ok", tokens=100)
+    return policy
+
+
+def test_no_hedge_while_warming_up():
+    policy = HedgePolicy(min_samples=5)
+    assert policy.threshold() is None
+    assert policy.call(lambda: "primary", lambda: "backup", tokens=10) == "primary"
+    assert policy.stats()["hedged"] == 0
+
+
+def test_slow_request_is_hedged():
+    policy = warmed_policy(max_extra_ratio=1.0)
+
+    def slow():
+        time.sleep(0.5)
+        return "primary"
+
+    assert policy.call(slow, lambda: "backup", tokens=100) == "backup"
+    stats = policy.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["extra_tokens"] == 100
+
+
+def test_hedge_budget_caps_extra_tokens():
+    policy = warmed_policy(max_extra_ratio=0.0)
+
+    def slow():
+        time.sleep(0.05)
+        return "primary"
+
+    assert policy.call(slow, lambda: "backup", tokens=100) == "primary"
+    assert policy.stats()["hedged"] == 0
+
+
+def test_async_hedge_cancels_loser():
+    policy = warmed_policy(max_extra_ratio=1.0)
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "primary"
+
+    async def fast():
+        return "backup"
+
+    async def run():
+        result = await policy.acall(slow, fast, tokens=100)
+        # let the cancellation reach the losing task before the loop shuts down
+        await asyncio.sleep(0)
+        return result, list(cancelled)
+
+    assert asyncio.run(run()) == ("backup", [True])
+
+
+def test_close_does_not_wait_for_losing_request():
+    policy = warmed_policy(max_extra_ratio=1.0)
+
+    def slow():
+        time.sleep(0.5)
+        return "primary"
+
+    assert policy.call(slow, lambda: "backup", tokens=100) == "backup"
+    started = time.perf_counter()
+    policy.close()
+    assert time.perf_counter() - started < 0.1
+
+
+def test_window_keeps_primary_latency_when_hedge_wins():
+    policy = warmed_policy(max_extra_ratio=1.0)
+
+    def slow():
+        time.sleep(0.3)
+        return "primary"
+
+    assert policy.call(slow, lambda: "backup", tokens=100) == "backup"
+    policy.close()
+    time.sleep(0.4)
+    # The slow primary's own latency, not the hedge's, ends up in the window
+    assert max(policy._latencies) >= 0.3
+
+
+def test_translate_retries_when_hedged_primary_times_out():
+    client = MagicMock()
+    reply = MagicMock()
+    reply.choices[0].message = ChatCompletionMessage(role="assistant", content="สวัสดี")
+    client.chat.completions.create.side_effect = [
+        openai.APITimeoutError(request=MagicMock()),
+        reply,
+    ]
+    config = {
+        "api_key": "test",
+        "endpoint": "https://api.deepseek.com",
+        "model": "deepseek-chat",
+        "context_length": 1000,
+        "system_prompt": {
+            "constraint": "Translate {source_language} to {target_language}.",
+            "variables": {"source_language": "English", "target_language": "Thai"},
+        },
+    }
+    dst = DeepSeekTranslator(
+        config=config, client=client, hedge=warmed_policy(max_extra_ratio=0.0)
+    )
+
+    with patch("utils.deepseek.time.sleep"):
+        assert dst.translate("Hello") == "สวัสดี"
+    # Only the backup request is bounded by the hedge timeout
+    client.with_options.assert_not_called()
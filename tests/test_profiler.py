@@ -0,0 +1,28 @@
+import json
+from utils.profiler import Profiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.span("ffprobe", file="video.mkv"):
+        pass
+    assert profiler.summary() == []
+
+
+def test_chrome_trace_and_summary(tmp_path):
+    profiler = Profiler()
+    profiler.enable()
+    with profiler.span("process_video", file="video.mkv"):
+        for _ in range(2):
+            with profiler.span("translate", file="video.mkv", batch=0):
+                pass
+
+    rows = {row[0]: row for row in profiler.summary()}
+    assert rows["translate"][1] == 2
+    assert rows["process_video"][1] == 1
+
+    trace = json.loads(profiler.write_chrome_trace(tmp_path / "trace.json").read_text())
+    events = trace["traceEvents"]
+    assert len(events) == 3
+    assert all(e["ph"] == "X" for e in events)
+    assert events[0]["args"] == {"file": "video.mkv", "batch": "0"}
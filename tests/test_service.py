@@ -0,0 +1,71 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from utils.service import TranslationService
+
+
+class SlowTranslator:
+    def __init__(self, calls: list):
+        self._calls = calls
+
+    def translate(self, text):
+        self._calls.append(list(text))
+        time.sleep(0.2)
+        return [f"th:{line}" for line in text]
+
+
+def make_service(calls: list) -> TranslationService:
+    session = MagicMock()
+    session.translator.side_effect = lambda **kwargs: SlowTranslator(calls)
+    return TranslationService(session, workers=4)
+
+
+def test_identical_requests_are_coalesced():
+    calls = []
+    service = make_service(calls)
+    payload = {"lines": ["Hello", "Bye"], "target_language": "Thai", "batch_size": 10}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(service.submit("lines", payload).result())
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"lines": ["th:Hello", "th:Bye"]}] * 3
+    assert len(calls) == 1
+    status = service.status()
+    assert status["coalesced"] == 2
+    assert status["completed"] == 1
+    assert status["queued"] == 0 and status["in_flight"] == 0
+
+
+def test_finished_requests_are_cached():
+    calls = []
+    service = make_service(calls)
+    payload = {"lines": ["Hello"], "batch_size": 10}
+
+    service.submit("lines", payload).result()
+    assert service.submit("lines", payload).result() == {"lines": ["th:Hello"]}
+    assert len(calls) == 1
+    assert service.status()["cache_hits"] == 1
+
+
+def test_close_cancels_queued_requests_and_closes_the_session():
+    calls = []
+    service = make_service(calls)
+    futures = [
+        service.submit("lines", {"lines": [f"Line {i}"], "batch_size": 10})
+        for i in range(8)
+    ]
+    service.close()
+
+    assert all(f.done() for f in futures)
+    assert any(f.cancelled() for f in futures)
+    assert len(calls) < 8
+    service._session.close.assert_called_once()
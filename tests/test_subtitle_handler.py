@@ -0,0 +1,86 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+import pysubs2
+from utils.subtitle_handler import (
+    find_subtitle_files,
+    sidecar_output_path,
+    translate_subtitle_group,
+)
+
+
+def test_sidecar_output_path_replaces_source_tag():
+    assert sidecar_output_path(Path("ep01.en.srt"), "eng", "tha") == Path(
+        "ep01.tha.srt"
+    )
+    assert sidecar_output_path(Path("ep01.ass"), "eng", "tha") == Path("ep01.tha.ass")
+    assert sidecar_output_path(Path("ep01.WEB.srt"), "eng", "tha") == Path(
+        "ep01.WEB.tha.srt"
+    )
+
+
+def test_find_subtitle_files_matches_iso_639_codes(tmp_path):
+    for source, tag in [("jpn", "ja"), ("spa", "es"), ("ger", "de"), ("zh", "chi")]:
+        directory = tmp_path / source
+        directory.mkdir()
+        (directory / f"ep01.{tag}.srt").touch()
+        (directory / "ep01.fre.srt").touch()  # another language
+
+        groups = find_subtitle_files(directory, source, "tha")
+        assert groups == {directory: [directory / f"ep01.{tag}.srt"]}
+
+
+def test_find_subtitle_files_keeps_untagged_names(tmp_path):
+    for name in ["Show.S01E01.WEB.srt", "Movie.2020.DTS.srt", "Movie.2020.deu.srt"]:
+        (tmp_path / name).touch()
+
+    groups = find_subtitle_files(tmp_path, "eng", "tha")
+    assert groups == {
+        tmp_path: [tmp_path / "Movie.2020.DTS.srt", tmp_path / "Show.S01E01.WEB.srt"]
+    }
+
+
+def test_find_subtitle_files_groups_by_directory(tmp_path):
+    season1 = tmp_path / "show" / "season1"
+    season2 = tmp_path / "show" / "season2"
+    season1.mkdir(parents=True)
+    season2.mkdir(parents=True)
+    for path in [
+        season1 / "ep01.en.srt",
+        season1 / "ep02.srt",
+        season1 / "ep02.tha.srt",  # translated by an earlier run
+        season1 / "ep03.fr.srt",  # another language
+        season1 / "ep03.mkv",
+        season2 / "ep01.eng.ass",
+    ]:
+        path.touch()
+
+    groups = find_subtitle_files(tmp_path, "eng", "tha")
+    assert groups == {
+        season1: [season1 / "ep01.en.srt"],
+        season2: [season2 / "ep01.eng.ass"],
+    }
+
+
+def test_find_subtitle_files_keeps_one_file_per_output(tmp_path):
+    for name in ["Ep01.srt", "Ep01.en.srt", "Ep01.eng.srt", "Ep02.srt"]:
+        (tmp_path / name).touch()
+
+    groups = find_subtitle_files(tmp_path, "eng", "tha")
+    assert groups == {tmp_path: [tmp_path / "Ep01.en.srt", tmp_path / "Ep02.srt"]}
+
+
+def test_translate_subtitle_group_accepts_uppercase_suffix(tmp_path):
+    sub_path = tmp_path / "Ep01.SRT"
+    subtitle = pysubs2.SSAFile()
+    subtitle.append(pysubs2.SSAEvent(start=0, end=900, text="hello"))
+    subtitle.save(str(sub_path))
+    dst = MagicMock()
+    dst.translate.side_effect = lambda text: [line.upper() for line in text]
+
+    groups = find_subtitle_files(tmp_path, "eng", "tha")
+    output_paths = translate_subtitle_group(
+        groups[tmp_path], dst, "eng", "tha", "task", MagicMock(), batch_size=10
+    )
+
+    assert output_paths == [tmp_path / "Ep01.tha.SRT"]
+    assert [e.text for e in pysubs2.load(str(output_paths[0])).events] == ["HELLO"]
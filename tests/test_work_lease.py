@@ -0,0 +1,131 @@
+import os
+import time
+from pathlib import Path
+from utils.work_lease import LeaseStore
+
+
+def make_store(tmp_path: Path, worker_id: str, ttl: float = 60.0) -> LeaseStore:
+    return LeaseStore(tmp_path / "leases", tmp_path, worker_id=worker_id, ttl=ttl)
+
+
+def test_claim_is_exclusive(tmp_path):
+    video = tmp_path / "show" / "ep01.mkv"
+    first = make_store(tmp_path, "worker-a")
+    second = make_store(tmp_path, "worker-b")
+
+    assert first.claim(video) is True
+    assert second.claim(video) is False
+
+    first.release(video)
+    assert second.claim(video) is True
+
+
+def test_done_video_is_not_claimed_again(tmp_path):
+    video = tmp_path / "ep01.mkv"
+    first = make_store(tmp_path, "worker-a")
+    second = make_store(tmp_path, "worker-b")
+
+    assert first.claim(video) is True
+    first.release(video, done=True)
+    assert second.claim(video) is False
+    assert first.claim(video) is False
+
+
+def test_stale_lease_is_reclaimed(tmp_path):
+    video = tmp_path / "ep01.mkv"
+    dead = make_store(tmp_path, "worker-a", ttl=5)
+    alive = make_store(tmp_path, "worker-b", ttl=5)
+
+    assert dead.claim(video) is True
+    lock_path = dead._lock_path(video)
+    past = time.time() - 60
+    os.utime(lock_path, (past, past))
+
+    assert alive.claim(video) is True
+    # The dead worker coming back must not remove the new owner's lock
+    dead.release(video)
+    assert lock_path.exists()
+
+
+def test_heartbeat_keeps_lease_fresh(tmp_path):
+    video = tmp_path / "ep01.mkv"
+    owner = make_store(tmp_path, "worker-a", ttl=5)
+    other = make_store(tmp_path, "worker-b", ttl=5)
+
+    assert owner.claim(video) is True
+    lock_path = owner._lock_path(video)
+    past = time.time() - 60
+    os.utime(lock_path, (past, past))
+    owner.heartbeat()
+
+    assert other.claim(video) is False
+
+
+def test_lost_lease_is_not_marked_done(tmp_path):
+    video = tmp_path / "ep01.mkv"
+    slow = make_store(tmp_path, "worker-a", ttl=5)
+    other = make_store(tmp_path, "worker-b", ttl=5)
+
+    assert slow.claim(video) is True
+    lock_path = slow._lock_path(video)
+    past = time.time() - 60
+    os.utime(lock_path, (past, past))
+    assert other.claim(video) is True
+
+    assert slow.holds(video) is False
+    slow.heartbeat()
+    slow.release(video, done=True)
+    assert not slow.is_done(video)
+    assert other.holds(video) is True
+
+
+def test_owner_heartbeat_during_reclaim_keeps_lease(tmp_path, monkeypatch):
+    video = tmp_path / "ep01.mkv"
+    owner = make_store(tmp_path, "worker-a", ttl=5)
+    reclaimer = make_store(tmp_path, "worker-b", ttl=5)
+
+    assert owner.claim(video) is True
+    lock_path = owner._lock_path(video)
+    past = time.time() - 60
+    os.utime(lock_path, (past, past))
+
+    real_rename = os.rename
+
+    def rename_after_heartbeat(src, dst):
+        # The owner refreshes its lease between the stale check and the rename
+        owner.heartbeat()
+        real_rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", rename_after_heartbeat)
+    assert reclaimer.claim(video) is False
+    monkeypatch.setattr(os, "rename", real_rename)
+
+    assert owner.holds(video) is True
+    assert reclaimer.holds(video) is False
+    assert list(lock_path.parent.glob("*.stale")) == []
+
+
+def test_lock_created_during_reclaim_is_not_overwritten(tmp_path, monkeypatch):
+    video = tmp_path / "ep01.mkv"
+    dead = make_store(tmp_path, "worker-a", ttl=5)
+    reclaimer = make_store(tmp_path, "worker-b", ttl=5)
+    third = make_store(tmp_path, "worker-c", ttl=5)
+
+    assert dead.claim(video) is True
+    lock_path = dead._lock_path(video)
+    past = time.time() - 60
+    os.utime(lock_path, (past, past))
+
+    real_rename = os.rename
+
+    def rename_then_third_claims(src, dst):
+        real_rename(src, dst)
+        monkeypatch.setattr(os, "rename", real_rename)
+        assert third.claim(video) is True
+
+    monkeypatch.setattr(os, "rename", rename_then_third_claims)
+    assert reclaimer.claim(video) is False
+
+    assert third.holds(video) is True
+    assert reclaimer.holds(video) is False
+    assert dead.holds(video) is False
@@ -0,0 +1,269 @@
+import json
+import time
+from pathlib import Path
+from openai import OpenAI
+from utils.deepseek import DeepSeekTranslator
+from utils.subtitle_handler import subtitle_batches, translate_subtitle
+from utils.video_handler import extract_subtitles, has_target_subtitle
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# Per-job limits of the OpenAI batch API, other providers are usually similar
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+
+class ReplayTranslator:
+    """
+    Stand-in for DeepSeekTranslator that hands out results fetched from a batch
+    job, in the order translate_subtitle asks for them. A missing result returns
+    the input unchanged, which translate_subtitle leaves untouched.
+    """
+
+    def __init__(self, results: list[str | None]):
+        self._results = iter(results)
+
+    def translate(self, text: str | list[str]) -> str | list[str]:
+        content = next(self._results, None)
+        if content is None:
+            return text
+        if isinstance(text, list):
+            return content.split("\\n")
+        return content
+
+    def get_chat_history(self):
+        return []
+
+
+def build_track_requests(
+    sub_path: Path, dst: DeepSeekTranslator, batch_size: int, prefix: str
+) -> list[dict]:
+    """
+    Build one batch API request per subtitle batch of sub_path.
+
+    Batch requests are independent, so each one carries only the system prompt
+    and its own lines instead of the rolling chat history translate() keeps.
+    """
+    return [
+        {
+            "custom_id": f"{prefix}-{i}",
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": dst.model,
+                "messages": [
+                    {"role": "system", "content": dst.system_prompt},
+                    {"role": "user", "content": content},
+                ],
+                "stream": False,
+            },
+        }
+        for i, content in enumerate(subtitle_batches(sub_path, batch_size))
+    ]
+
+
+def build_library_requests(
+    video_files: list[Path],
+    source_track: str,
+    target_track: str,
+    batch_size: int,
+    dst: DeepSeekTranslator,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Extract the source tracks of every video and build their batch requests.
+
+    Returns:
+        tuple: The request lines and, per video, the extracted tracks together
+        with the custom_ids of their requests.
+    """
+    requests, videos = [], []
+    for v, video_path in enumerate(video_files):
+        if has_target_subtitle(video_path, target_track):
+            print(f"Skipped ({target_track} subtitle track exists): {video_path.name}")
+            continue
+        if not has_target_subtitle(video_path, source_track):
+            print(f"No {source_track} subtitle track: {video_path.name}")
+            continue
+        tracks = []
+        for t, (sub_path, title) in enumerate(
+            extract_subtitles(video_path, source_track)
+        ):
+            track_requests = build_track_requests(sub_path, dst, batch_size, f"{v}-{t}")
+            requests += track_requests
+            tracks.append(
+                {
+                    "subtitle": str(sub_path),
+                    "title": title,
+                    "requests": [r["custom_id"] for r in track_requests],
+                }
+            )
+        if tracks:
+            videos.append({"video": str(video_path), "tracks": tracks})
+    return requests, videos
+
+
+def write_requests(requests: list[dict], path: Path) -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+    return path
+
+
+def split_requests(
+    requests: list[dict],
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+) -> list[list[dict]]:
+    """Split requests into chunks that each fit in one batch job."""
+    assert max_requests > 0, "max_requests must be positive"
+    chunks, chunk, size = [], [], 0
+    for request in requests:
+        line_size = len(json.dumps(request, ensure_ascii=False).encode("utf-8")) + 1
+        if chunk and (len(chunk) >= max_requests or size + line_size > max_bytes):
+            chunks.append(chunk)
+            chunk, size = [], 0
+        chunk.append(request)
+        size += line_size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def submit_requests(
+    client: OpenAI, requests: list[dict], prefix: Path, max_requests: int
+) -> list[dict]:
+    """
+    Submit requests as as many batch jobs as the per-job limits need.
+
+    Returns:
+        list: {"batch_id", "requests_file"} per job, as stored in the manifest.
+    """
+    batches = []
+    for n, chunk in enumerate(split_requests(requests, max_requests)):
+        requests_path = write_requests(
+            chunk, prefix.with_name(f"{prefix.name}-{n}.jsonl")
+        )
+        batch = submit_batch(client, requests_path)
+        batches.append({"batch_id": batch.id, "requests_file": str(requests_path)})
+    return batches
+
+
+def submit_batch(client: OpenAI, requests_path: Path):
+    """Upload the JSONL file and create the batch job."""
+    with open(requests_path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    return client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+
+
+def wait_for_batch(client: OpenAI, batch_id: str, poll_interval: float = 60.0):
+    """Poll the batch job until it reaches a final status."""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in FINAL_STATUSES:
+            return batch
+        counts = batch.request_counts
+        if counts is not None:
+            print(
+                f"Batch {batch_id} {batch.status}: {counts.completed}/{counts.total} done"
+            )
+        else:
+            print(f"Batch {batch_id} {batch.status}")
+        time.sleep(poll_interval)
+
+
+def _read_file(client: OpenAI, file_id: str | None) -> list[dict]:
+    if not file_id:
+        return []
+    return [
+        json.loads(line)
+        for line in client.files.content(file_id).text.splitlines()
+        if line.strip()
+    ]
+
+
+def download_results(client: OpenAI, batch) -> dict[str, str]:
+    """
+    Map custom_id to the translated content of every successful request.
+
+    Failed requests are listed in the batch's error file, or in the output file
+    with a non-200 status; they are reported and left out of the mapping.
+    """
+    results, failed = {}, 0
+    records = _read_file(client, batch.output_file_id) + _read_file(
+        client, batch.error_file_id
+    )
+    for record in records:
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            failed += 1
+            print(
+                f"Batch request {record.get('custom_id')} failed: "
+                f"{record.get('error') or response.get('status_code')}"
+            )
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"][
+            "content"
+        ]
+    if failed:
+        print(f"{failed} of {len(records)} batch requests failed.")
+    elif not batch.output_file_id:
+        print(f"Batch {batch.id} has no output file.")
+    return results
+
+
+def missing_requests(video: dict, results: dict[str, str]) -> list[str]:
+    """custom_ids of a manifest video entry that have no result."""
+    return [
+        cid
+        for track in video["tracks"]
+        for cid in track["requests"]
+        if cid not in results
+    ]
+
+
+def read_requests(path: Path, custom_ids: list[str]) -> list[dict]:
+    """Load the request lines of path whose custom_id is in custom_ids."""
+    wanted = set(custom_ids)
+    with open(path, "r", encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    return [r for r in requests if r["custom_id"] in wanted]
+
+
+def apply_video_results(
+    video: dict,
+    results: dict[str, str],
+    batch_size: int,
+    target_track: str,
+    progress_task,
+    progress,
+) -> list[tuple[Path, str, str]]:
+    """
+    Write the translated subtitles of one manifest video entry.
+
+    Every request of the entry must have a result, otherwise an untranslated
+    track would be embedded under the target language; check with
+    missing_requests first.
+
+    Returns:
+        list: (subtitle_path, subtitle_title, subtitle_language) as embed_subtitle expects.
+    """
+    assert not missing_requests(video, results), "video has requests without results"
+    video_path = Path(video["video"])
+    translated_subs = []
+    for track in video["tracks"]:
+        sub_path = Path(track["subtitle"])
+        replay = ReplayTranslator([results.get(cid) for cid in track["requests"]])
+        translated_sub = translate_subtitle(
+            sub_path,
+            replay,  # pyright: ignore
+            progress_task,
+            progress,
+            output_path=str(video_path.with_suffix(sub_path.suffix)),
+            batch_size=batch_size,
+        )
+        translated_subs.append((translated_sub, track["title"], target_track))
+    return translated_subs
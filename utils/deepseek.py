@@ -2,9 +2,29 @@ import yaml
 import pathlib
 import openai
 import time
-from openai import OpenAI
+import asyncio
+from openai import OpenAI, AsyncOpenAI
 from openai.types.chat import ChatCompletionMessage
 from deepseek_tokenizer import ds_token
+from utils.profiler import profiler
+from utils.hedging import DEFAULT_HEDGE_CONFIG, HedgePolicy
+
+
+def load_config(config_path: str = "config/deepseek.yml") -> dict:
+    """Load the YAML config file, returning an empty dict when it does not exist."""
+    config_file = pathlib.Path(config_path)
+    if config_file.exists():
+        with open(config_file, "r") as f:
+            return yaml.safe_load(f) or {}
+    return {}
+
+
+def _base_url(endpoint: str) -> str | None:
+    return endpoint if "openai" not in endpoint else None
+
+
+def _line_count(text: str | list[str]) -> int:
+    return len(text) if isinstance(text, list) else 1
 
 
 class DeepSeekTranslator:
@@ -23,6 +43,10 @@ class DeepSeekTranslator:
         system_prompt: str = "",
         context_limiter: float = 0.7,
         config_path: str = "config/deepseek.yml",
+        config: dict | None = None,
+        client: OpenAI | None = None,
+        async_client: AsyncOpenAI | None = None,
+        hedge: HedgePolicy | None = None,
     ):
         """
         Initialize the translator with optional parameters or a YAML config file.
@@ -37,15 +61,16 @@ class DeepSeekTranslator:
             system_prompt (str): Custom system prompt template.
             context_limiter (float): Multiplier for context length.
             config_path (str): Path to YAML config file.
+            config (dict): Already parsed config, skips reading config_path.
+            client (OpenAI): Shared client to use instead of creating a new one.
+            async_client (AsyncOpenAI): Shared async client used by atranslate.
+            hedge (HedgePolicy): Send duplicate requests when a call runs slow.
         Raises:
             ValueError: If required values are missing.
         """
         # Load config file if it exists
-        config = {}
-        config_file = pathlib.Path(config_path)
-        if config_file.exists():
-            with open(config_file, "r") as f:
-                config = yaml.safe_load(f)
+        if config is None:
+            config = load_config(config_path)
 
         # Use provided arguments or fallback to config
         self._api_key = api_key or config.get("api_key", "")
@@ -89,11 +114,22 @@ class DeepSeekTranslator:
         self._update_prompt()
         self.clear_chat_history()
 
-        # Set up openai client
-        self._client = OpenAI(
-            api_key=self._api_key,
-            base_url=self._endpoint if "openai" not in self._endpoint else None,
+        # Set up openai clients, the async one is created lazily on first use
+        self._client = client or OpenAI(
+            api_key=self._api_key, base_url=_base_url(self._endpoint)
         )
+        self._async_client = async_client
+        self._hedge = hedge
+
+    @property
+    def model(self) -> str:
+        """Model name requests are sent to."""
+        return self._model
+
+    @property
+    def context_length(self) -> int:
+        """Token budget used when trimming the chat history."""
+        return self._context_length
 
     def _update_prompt(self):
         """Internal method to update the formatted system prompt."""
@@ -164,20 +200,16 @@ class DeepSeekTranslator:
 
     def _count_tokens(self, messages: list) -> int:
         """Count the total tokens in the list of chat messages."""
-        return sum(len(ds_token.encode(msg["content"])) for msg in messages)
+        with profiler.span("count_tokens", messages=len(messages)):
+            return sum(len(ds_token.encode(msg["content"])) for msg in messages)
 
-    def translate(self, text: str | list[str]) -> str | list[str]:
+    def _push_user_message(self, text: str | list[str]) -> int:
         """
-        Translate the given text using DeepSeek API.
-
-        Args:
-            text (str) | list[str]: The input text to translate.
+        Append the new input to the chat history, trimming old messages to fit the context.
 
         Returns:
-            str: The translated text.
+            int: Token count of the chat history that will be sent.
         """
-        assert type(text) in [str, list], "text must be str or list"
-
         new_input = "\\n".join(text) if isinstance(text, list) else text
         new_message = {"role": "user", "content": new_input}
 
@@ -194,13 +226,84 @@ class DeepSeekTranslator:
 
         # Finally update the chat history with current message
         self.update_chat_history(new_message)
+        return total_tokens
 
-        try:
-            response = self._client.chat.completions.create(
-                model=self._model,
-                messages=self._chat_history,  # pyright: ignore
-                stream=False,
+    def _create_completion(self, tokens: int):
+        """Send the chat history, hedging the request when a HedgePolicy is set."""
+        messages = list(self._chat_history)
+
+        def request(client, model):
+            return client.chat.completions.create(
+                model=model, messages=messages, stream=False  # pyright: ignore
             )
+
+        if self._hedge is None:
+            return request(self._client, self._model)
+        # The primary keeps the client's own timeout, so hedging never fails a
+        # slow request that would succeed without it; only the backup is bounded
+        timeout = self._hedge.timeout
+        return self._hedge.call(
+            lambda: request(self._client, self._model),
+            lambda: request(
+                (self._hedge.client or self._client).with_options(timeout=timeout),
+                self._hedge.model or self._model,
+            ),
+            tokens,
+        )
+
+    async def _acreate_completion(self, tokens: int):
+        """Asynchronous variant of _create_completion."""
+        messages = list(self._chat_history)
+
+        def request(client, model):
+            return client.chat.completions.create(
+                model=model, messages=messages, stream=False  # pyright: ignore
+            )
+
+        if self._hedge is None:
+            return await request(self._async_client, self._model)
+        timeout = self._hedge.timeout
+        return await self._hedge.acall(
+            lambda: request(self._async_client, self._model),
+            lambda: request(
+                (self._hedge.async_client or self._async_client).with_options(
+                    timeout=timeout
+                ),
+                self._hedge.model or self._model,
+            ),
+            tokens,
+        )
+
+    def _pop_response(
+        self, text: str | list[str], message: ChatCompletionMessage
+    ) -> str | list[str]:
+        """Store the assistant reply in the chat history and shape it like the input."""
+        self.update_chat_history(message)
+        translated_content = message.content
+        if isinstance(text, list):
+            # FIX: hallucination issue (output lines are not same as input lines)
+            translated_content = translated_content.split("\\n")
+        return translated_content
+
+    def translate(self, text: str | list[str]) -> str | list[str]:
+        """
+        Translate the given text using DeepSeek API.
+
+        Args:
+            text (str) | list[str]: The input text to translate.
+
+        Returns:
+            str: The translated text.
+        """
+        assert type(text) in [str, list], "text must be str or list"
+
+        tokens = self._push_user_message(text)
+
+        try:
+            with profiler.span(
+                "api_request", model=self._model, lines=_line_count(text)
+            ):
+                response = self._create_completion(tokens)
         except openai.APIStatusError as e:
             if e.status_code == 402:
                 print("You have run out of balance.")
@@ -217,10 +320,170 @@ class DeepSeekTranslator:
                 print(f"Unhandled API error: {e}")
                 self.clear_chat_history()
                 return self.translate(text)
+        except openai.APIConnectionError as e:
+            # Includes openai.APITimeoutError
+            print(f"Connection error ({e}). Retrying in 5 seconds...")
+            time.sleep(5)
+            return self.translate(text)
 
-        self.update_chat_history(response.choices[0].message)
-        translated_content = response.choices[0].message.content
-        if isinstance(text, list):
-            # FIX: hallucination issue (output lines are not same as input lines)
-            translated_content = translated_content.split("\\n")
-        return translated_content
+        return self._pop_response(text, response.choices[0].message)
+
+    async def atranslate(self, text: str | list[str]) -> str | list[str]:
+        """
+        Asynchronous variant of translate built on the shared AsyncOpenAI client.
+
+        Args:
+            text (str) | list[str]: The input text to translate.
+
+        Returns:
+            str: The translated text.
+
+        Raises:
+            RuntimeError: If the translator has no async client.
+        """
+        assert type(text) in [str, list], "text must be str or list"
+
+        if self._async_client is None:
+            raise RuntimeError(
+                "atranslate needs an async client, create the translator with "
+                "TranslatorSession.atranslator() or pass async_client."
+            )
+
+        tokens = self._push_user_message(text)
+
+        try:
+            with profiler.span(
+                "api_request", model=self._model, lines=_line_count(text)
+            ):
+                response = await self._acreate_completion(tokens)
+        except openai.APIStatusError as e:
+            if e.status_code == 402:
+                print("You have run out of balance.")
+                exit(1)
+            elif e.status_code == 429:
+                print("You have reached the rate limit.")
+                await asyncio.sleep(5)
+                return await self.atranslate(text)
+            elif e.status_code in [500, 503]:
+                print("Server error. Retrying in 5 seconds...")
+                await asyncio.sleep(5)
+                return await self.atranslate(text)
+            else:
+                print(f"Unhandled API error: {e}")
+                self.clear_chat_history()
+                return await self.atranslate(text)
+        except openai.APIConnectionError as e:
+            # Includes openai.APITimeoutError
+            print(f"Connection error ({e}). Retrying in 5 seconds...")
+            await asyncio.sleep(5)
+            return await self.atranslate(text)
+
+        return self._pop_response(text, response.choices[0].message)
+
+
+class TranslatorSession:
+    """
+    Run-wide owner of the parsed config and the pooled API clients.
+
+    Translators created through the session share one OpenAI client, so every
+    file reuses the same kept-alive connections while still getting its own chat
+    context. The AsyncOpenAI client is only created once atranslator() is used,
+    from inside the event loop, and is closed by aclose().
+    """
+
+    def __init__(
+        self, config_path: str = "config/deepseek.yml", hedge: bool = False, **overrides
+    ):
+        """
+        Args:
+            config_path (str): Path to YAML config file, read once per session.
+            hedge (bool): Hedge slow requests using the config's `hedge` section.
+            **overrides: Keyword arguments forwarded to every DeepSeekTranslator.
+        """
+        self._config = load_config(config_path)
+        self._overrides = overrides
+        # Build a first translator to validate the config and resolve credentials
+        template = DeepSeekTranslator(config=self._config, **overrides)
+        self._client = template._client
+        self._api_key = template._api_key
+        self._endpoint = template._endpoint
+        self._async_client = None
+        self._hedge_credentials = None
+        self.hedge = self._build_hedge(template) if hedge else None
+
+    def _build_hedge(self, template: DeepSeekTranslator) -> HedgePolicy:
+        """Create the run-wide HedgePolicy, with backup clients if an endpoint is set."""
+        hedge_config = {**DEFAULT_HEDGE_CONFIG, **(self._config.get("hedge") or {})}
+        client = None
+        if hedge_config.get("endpoint"):
+            api_key = hedge_config.get("api_key") or template._api_key
+            base_url = _base_url(hedge_config["endpoint"])
+            client = OpenAI(api_key=api_key, base_url=base_url)
+            self._hedge_credentials = (api_key, base_url)
+        return HedgePolicy(
+            percentile=hedge_config["percentile"],
+            min_samples=hedge_config["min_samples"],
+            window=hedge_config["window"],
+            max_extra_ratio=hedge_config["max_extra_ratio"],
+            timeout=hedge_config["timeout"],
+            client=client,
+            model=hedge_config.get("model", ""),
+        )
+
+    @property
+    def client(self) -> OpenAI:
+        """The shared synchronous client."""
+        return self._client
+
+    def translator(self, **kwargs) -> DeepSeekTranslator:
+        """Create a translator with a fresh chat context on the shared clients."""
+        return DeepSeekTranslator(
+            config=self._config,
+            client=self._client,
+            async_client=self._async_client,
+            hedge=self.hedge,
+            **{**self._overrides, **kwargs},
+        )
+
+    def atranslator(self, **kwargs) -> DeepSeekTranslator:
+        """Like translator(), creating the shared AsyncOpenAI client on first use."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self._api_key, base_url=_base_url(self._endpoint)
+            )
+            if self.hedge is not None and self._hedge_credentials is not None:
+                api_key, base_url = self._hedge_credentials
+                self.hedge.async_client = AsyncOpenAI(
+                    api_key=api_key, base_url=base_url
+                )
+        return self.translator(**kwargs)
+
+    def close(self) -> None:
+        """Stop hedging and close the synchronous connection pools."""
+        if self.hedge is not None:
+            self.hedge.close()
+            if self.hedge.client is not None:
+                self.hedge.client.close()
+        self._client.close()
+
+    async def aclose(self) -> None:
+        """Close the synchronous and, if created, the asynchronous connection pools."""
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self.hedge is not None and self.hedge.async_client is not None:
+            await self.hedge.async_client.close()
+            self.hedge.async_client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,228 @@
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import ceil
+from pathlib import Path
+from deepseek_tokenizer import ds_token
+from rich.console import Console
+from rich.progress import Progress
+from rich.table import Table
+from utils.subtitle_handler import subtitle_batches
+from utils.video_handler import extract_subtitles, has_target_subtitle
+
+# Used when config/deepseek.yml has no `estimate` section
+DEFAULT_ESTIMATE_CONFIG = {
+    "output_ratio": 1.0,
+    "request_latency": 2.0,
+    "output_tokens_per_second": 30.0,
+    "pricing": {},
+}
+
+TOKEN_FIELDS = ("requests", "input_tokens", "cached_tokens", "output_tokens")
+
+
+def count_tokens(text: str) -> int:
+    return len(ds_token.encode(text))
+
+
+def simulate_translation(
+    system_tokens: int,
+    batch_tokens: list[int],
+    context_length: int,
+    output_ratio: float = 1.0,
+) -> dict:
+    """
+    Replay DeepSeekTranslator.translate's history handling on token counts.
+
+    The chat history starts with the system prompt, every batch is appended as a
+    user message after trimming the oldest messages to fit context_length, and
+    the reply (estimated as output_ratio times the batch) is appended after it.
+    Cached tokens are the prefix a request shares with the previous request,
+    which is what the API's context cache can serve.
+
+    Args:
+        system_tokens (int): Token count of the formatted system prompt.
+        batch_tokens (list[int]): Token count of each user message, in order.
+        context_length (int): The translator's context_length.
+        output_ratio (float): Expected output tokens per input token.
+
+    Returns:
+        dict: requests, input_tokens, cached_tokens and output_tokens.
+    """
+    # Each message is (id, tokens) so prompts can be compared by identity
+    history = [(0, system_tokens)]
+    previous_prompt = []
+    totals = dict.fromkeys(TOKEN_FIELDS, 0)
+    for i, tokens in enumerate(batch_tokens):
+        message = (2 * i + 1, tokens)
+        while sum(t for _, t in history) + tokens > context_length and len(history) > 1:
+            history.pop(1)
+        history.append(message)
+
+        cached = 0
+        for current, previous in zip(history, previous_prompt):
+            if current[0] != previous[0]:
+                break
+            cached += current[1]
+        previous_prompt = list(history)
+
+        output = round(tokens * output_ratio)
+        totals["requests"] += 1
+        totals["input_tokens"] += sum(t for _, t in history)
+        totals["cached_tokens"] += cached
+        totals["output_tokens"] += output
+        history.append((2 * i + 2, output))
+    return totals
+
+
+def estimate_video(
+    video_path: Path,
+    source_track: str,
+    target_track: str,
+    batch_size: int,
+    system_prompt: str,
+    context_length: int,
+    output_ratio: float,
+) -> dict:
+    """
+    Estimate the token usage process_video would have for video_path.
+
+    Subtitles are extracted into a temporary directory so the library is left
+    untouched, and no API call is made.
+    """
+    result = {
+        "file": video_path,
+        "tracks": 0,
+        "status": "",
+        **dict.fromkeys(TOKEN_FIELDS, 0),
+    }
+    try:
+        if has_target_subtitle(video_path, target_track):
+            result["status"] = f"skip ({target_track} exists)"
+            return result
+        if not has_target_subtitle(video_path, source_track):
+            result["status"] = f"skip (no {source_track})"
+            return result
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_subs = extract_subtitles(video_path, source_track, Path(tmp_dir))
+            # process_video shares one translator, and so one history, across tracks
+            batch_tokens = []
+            for sub_path, _ in source_subs:
+                batch_tokens += [
+                    count_tokens(c) for c in subtitle_batches(sub_path, batch_size)
+                ]
+        result["tracks"] = len(source_subs)
+        result.update(
+            simulate_translation(
+                count_tokens(system_prompt), batch_tokens, context_length, output_ratio
+            )
+        )
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = f"error: {e}"
+    return result
+
+
+def estimated_seconds(result: dict, estimate_config: dict) -> float:
+    return result["requests"] * estimate_config["request_latency"] + (
+        result["output_tokens"] / estimate_config["output_tokens_per_second"]
+    )
+
+
+def estimated_cost(result: dict, pricing: dict) -> float | None:
+    """Cost from per-million-token prices, None when pricing is not configured."""
+    if not pricing:
+        return None
+    uncached = result["input_tokens"] - result["cached_tokens"]
+    cached_price = pricing.get("cached_input", pricing.get("input", 0))
+    return (
+        uncached * pricing.get("input", 0)
+        + result["cached_tokens"] * cached_price
+        + result["output_tokens"] * pricing.get("output", 0)
+    ) / 1e6
+
+
+def estimate_library(
+    video_files: list[Path],
+    source_track: str,
+    target_track: str,
+    batch_size: int,
+    system_prompt: str,
+    context_length: int,
+    estimate_config: dict | None = None,
+    workers: int | None = None,
+) -> list[dict]:
+    """Estimate every video across a process pool and print the report."""
+    estimate_config = {**DEFAULT_ESTIMATE_CONFIG, **(estimate_config or {})}
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers or None
+    ) as pool, Progress() as progress:
+        task = progress.add_task("[cyan]Estimating videos...", total=len(video_files))
+        futures = [
+            pool.submit(
+                estimate_video,
+                Path(video_file),
+                source_track,
+                target_track,
+                batch_size,
+                system_prompt,
+                context_length,
+                estimate_config["output_ratio"],
+            )
+            for video_file in video_files
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+            progress.update(task, advance=1)
+    results.sort(key=lambda r: str(r["file"]))
+    print_estimate(results, estimate_config)
+    return results
+
+
+def print_estimate(results: list[dict], estimate_config: dict) -> None:
+    pricing = estimate_config.get("pricing") or {}
+    table = Table(title="Translation estimate (no API calls made)")
+    for column in (
+        "File",
+        "Status",
+        "Tracks",
+        "Requests",
+        "Input",
+        "Cached",
+        "Output",
+        "Time (min)",
+    ):
+        table.add_column(
+            column, justify="left" if column in ("File", "Status") else "right"
+        )
+    if pricing:
+        table.add_column("Cost", justify="right")
+
+    total = {"tracks": 0, **dict.fromkeys(TOKEN_FIELDS, 0)}
+    for result in results:
+        for key in total:
+            total[key] += result[key]
+        table.add_row(
+            *_estimate_row(Path(result["file"]).name, result, estimate_config)
+        )
+    total["status"] = f"{len(results)} files"
+    table.add_section()
+    table.add_row(*_estimate_row("Total", total, estimate_config))
+    Console().print(table)
+
+
+def _estimate_row(name: str, result: dict, estimate_config: dict) -> list[str]:
+    row = [
+        name,
+        result["status"],
+        str(result["tracks"]),
+        str(result["requests"]),
+        str(result["input_tokens"]),
+        str(result["cached_tokens"]),
+        str(result["output_tokens"]),
+        f"{ceil(estimated_seconds(result, estimate_config)) / 60:.1f}",
+    ]
+    cost = estimated_cost(result, estimate_config.get("pricing") or {})
+    if cost is not None:
+        row.append(f"{cost:.4f}")
+    return row
@@ -1,7 +1,12 @@
 from pathlib import Path
 
 VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".flv"}
+SUBTITLE_EXTENSIONS = {".srt", ".ass"}
 
 
 def is_video_file(path: Path) -> bool:
     return path.suffix.lower() in VIDEO_EXTENSIONS
+
+
+def is_subtitle_file(path: Path) -> bool:
+    return path.suffix.lower() in SUBTITLE_EXTENSIONS
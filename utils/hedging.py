@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Used for any key missing from the config's `hedge` section
+DEFAULT_HEDGE_CONFIG = {
+    "percentile": 0.95,
+    "min_samples": 20,
+    "window": 200,
+    "max_extra_ratio": 0.05,
+    "timeout": 120.0,
+}
+
+
+class HedgePolicy:
+    """
+    Hedged API requests to cut tail latency.
+
+    Keeps a rolling window of request latencies. When a request is still running
+    after the configured percentile of that window, a duplicate is sent (to the
+    same or a backup endpoint) and whichever finishes first wins. Hedging stops
+    once the hedges' prompt tokens would exceed max_extra_ratio of the primary
+    requests' prompt tokens.
+
+    A losing asyncio request is cancelled. A losing synchronous request cannot
+    be interrupted, so its thread finishes in the background and the reply is
+    discarded. The timeout bounds the backup request; the primary keeps the
+    client's timeout, as it would without hedging. close() drops queued work
+    without waiting for running requests.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        max_extra_ratio: float = 0.05,
+        timeout: float = 120.0,
+        client=None,
+        async_client=None,
+        model: str = "",
+    ):
+        """
+        Args:
+            percentile (float): Latency percentile (0-1) after which to hedge.
+            min_samples (int): Latencies to observe before hedging starts.
+            window (int): Number of recent latencies kept.
+            max_extra_ratio (float): Cap on hedge tokens relative to primary tokens.
+            timeout (float): Timeout in seconds of the backup request.
+            client (OpenAI): Backup endpoint client for sync hedges, None for the primary.
+            async_client (AsyncOpenAI): Backup endpoint client for async hedges.
+            model (str): Model on the backup endpoint, empty for the primary model.
+        """
+        assert 0 < percentile < 1, "percentile must be between 0 and 1"
+        assert max_extra_ratio >= 0, "max_extra_ratio must not be negative"
+        assert timeout > 0, "timeout must be positive"
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra_ratio = max_extra_ratio
+        self.timeout = timeout
+        self.client = client
+        self.async_client = async_client
+        self.model = model
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+        self._stats = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "primary_tokens": 0,
+            "extra_tokens": 0,
+        }
+
+    def close(self) -> None:
+        """Shut the thread pool down without waiting for losing requests."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def threshold(self) -> float | None:
+        """Latency in seconds after which a request is hedged, None while warming up."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * self.percentile), len(ordered) - 1)]
+
+    def _start(self, tokens: int) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["primary_tokens"] += tokens
+
+    def _try_hedge(self, tokens: int) -> bool:
+        """Reserve budget for a hedge of tokens, False when the cap is reached."""
+        with self._lock:
+            budget = self._stats["primary_tokens"] * self.max_extra_ratio
+            if self._stats["extra_tokens"] + tokens > budget:
+                return False
+            self._stats["hedged"] += 1
+            self._stats["extra_tokens"] += tokens
+            return True
+
+    def _record_primary(self, started: float):
+        """
+        Done-callback recording the primary request's own latency.
+
+        The window must keep the slow tail even when a hedge wins, otherwise the
+        threshold keeps falling. A primary cancelled as the loser (async only)
+        records the time until cancellation, a lower bound of its latency.
+        """
+
+        def record(_):
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+
+        return record
+
+    def _finish(self, hedge_won: bool) -> None:
+        if hedge_won:
+            with self._lock:
+                self._stats["hedge_wins"] += 1
+
+    def stats(self) -> dict:
+        """Return a copy of the hedge counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    def report(self) -> str:
+        stats = self.stats()
+        extra = (
+            stats["extra_tokens"] / stats["primary_tokens"] * 100
+            if stats["primary_tokens"]
+            else 0.0
+        )
+        return (
+            f"Hedging: {stats['hedged']}/{stats['requests']} requests hedged, "
+            f"{stats['hedge_wins']} won by the hedge, +{extra:.1f}% prompt tokens"
+        )
+
+    def call(self, primary, backup, tokens: int):
+        """
+        Run primary() and, if it is slow, backup() in parallel.
+
+        Args:
+            primary (callable): Sends the request to the primary endpoint.
+            backup (callable): Sends the duplicate request.
+            tokens (int): Prompt tokens of the request, charged again per hedge.
+
+        Returns:
+            The result of whichever call succeeded first.
+        """
+        self._start(tokens)
+        threshold = self.threshold()
+        started = time.perf_counter()
+        first = self._executor.submit(primary)
+        first.add_done_callback(self._record_primary(started))
+        if threshold is None or wait([first], timeout=threshold)[0]:
+            return first.result()
+        if not self._try_hedge(tokens):
+            return first.result()
+
+        second = self._executor.submit(backup)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self._finish(hedge_won=future is second)
+                    return future.result()
+        # Both failed, surface the primary's error
+        return first.result()
+
+    async def acall(self, primary, backup, tokens: int):
+        """
+        Asynchronous variant of call, the losing request is cancelled.
+
+        Args:
+            primary (callable): Returns the coroutine for the primary request.
+            backup (callable): Returns the coroutine for the duplicate request.
+            tokens (int): Prompt tokens of the request, charged again per hedge.
+        """
+        self._start(tokens)
+        threshold = self.threshold()
+        started = time.perf_counter()
+        first = asyncio.ensure_future(primary())
+        first.add_done_callback(self._record_primary(started))
+        hedge = False
+        if threshold is not None:
+            await asyncio.wait({first}, timeout=threshold)
+            hedge = not first.done() and self._try_hedge(tokens)
+        if not hedge:
+            return await first
+
+        second = asyncio.ensure_future(backup())
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self._finish(hedge_won=task is second)
+                        return task.result()
+            # Both failed, surface the primary's error
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
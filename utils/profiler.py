@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+
+_NULL_SPAN = nullcontext()
+
+
+class Profiler:
+    """
+    Records timed spans for the processing stages and writes them out as a
+    Chrome trace-event JSON file (viewable in chrome://tracing, Perfetto or
+    speedscope as a flamegraph) plus a per-stage aggregate table.
+
+    Disabled by default, in which case span() hands back a shared no-op
+    context manager so instrumented code pays only a method call.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self) -> None:
+        """Start recording spans, timestamps are relative to this call."""
+        self._events = []
+        self._origin = time.perf_counter()
+        self.enabled = True
+
+    def span(self, name: str, **attrs):
+        """
+        Time the enclosed block as a stage called name.
+
+        Args:
+            name (str): Stage name, spans with the same name are aggregated.
+            **attrs: Extra attributes (file, track, ...) stored on the event.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._record(name, attrs)
+
+    @contextmanager
+    def _record(self, name: str, attrs: dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            event = {
+                "name": name,
+                "cat": "deepsub",
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {k: str(v) for k, v in attrs.items()},
+            }
+            with self._lock:
+                self._events.append(event)
+
+    def summary(self) -> list[tuple[str, int, float, float, float]]:
+        """Return (stage, calls, total_s, mean_s, max_s) rows sorted by total time."""
+        durations = defaultdict(list)
+        for event in self._events:
+            durations[event["name"]].append(event["dur"] / 1e6)
+        rows = [
+            (name, len(d), sum(d), sum(d) / len(d), max(d))
+            for name, d in durations.items()
+        ]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def write_chrome_trace(self, path: str | Path) -> Path:
+        """Dump the recorded spans in Chrome trace-event format."""
+        path = Path(path)
+        with open(path, "w") as f:
+            json.dump(
+                {"traceEvents": self._events, "displayTimeUnit": "ms"},
+                f,
+                ensure_ascii=False,
+            )
+        return path
+
+    def print_summary(self, console: Console | None = None) -> None:
+        """Print the per-stage aggregate table."""
+        table = Table(title="Stage profile")
+        table.add_column("Stage")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total (s)", justify="right")
+        table.add_column("Mean (ms)", justify="right")
+        table.add_column("Max (ms)", justify="right")
+        for name, calls, total, mean, longest in self.summary():
+            table.add_row(
+                name,
+                str(calls),
+                f"{total:.3f}",
+                f"{mean * 1e3:.1f}",
+                f"{longest * 1e3:.1f}",
+            )
+        (console or Console()).print(table)
+
+
+profiler = Profiler()
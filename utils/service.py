@@ -0,0 +1,272 @@
+import hashlib
+import json
+import pysubs2
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from utils.deepseek import TranslatorSession
+from utils.subtitle_handler import batch_list, translate_subtitle
+
+
+class _SilentProgress:
+    """translate_subtitle reports progress through rich, the service has no bar."""
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+class TranslationService:
+    """
+    Long-running translation backend shared by every client of the HTTP service.
+
+    All requests run on one TranslatorSession, so the config, the API client and
+    its connection pool stay warm. Finished results are kept in an LRU cache, and
+    a request identical to one still in flight waits for that one instead of
+    being sent to the API again.
+    """
+
+    def __init__(
+        self, session: TranslatorSession, workers: int = 4, cache_size: int = 1024
+    ):
+        """
+        Args:
+            session (TranslatorSession): Session providing translators.
+            workers (int): Translations run at the same time, the rest are queued.
+            cache_size (int): Number of finished results kept.
+        """
+        self._session = session
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="translate"
+        )
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._stats = {
+            "requests": 0,
+            "queued": 0,
+            "in_flight": 0,
+            "completed": 0,
+            "failed": 0,
+            "coalesced": 0,
+            "cache_hits": 0,
+            "lines_translated": 0,
+        }
+
+    @staticmethod
+    def _key(kind: str, payload: dict) -> str:
+        raw = json.dumps([kind, payload], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def submit(self, kind: str, payload: dict) -> Future:
+        """
+        Queue a translation, reusing a cached or in-flight identical request.
+
+        Args:
+            kind (str): "lines" or "subtitle".
+            payload (dict): The validated request body.
+
+        Returns:
+            Future: Resolves to the response body.
+        """
+        key = self._key(kind, payload)
+        with self._lock:
+            self._stats["requests"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                future = Future()
+                future.set_result(self._cache[key])
+                return future
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+                return self._pending[key]
+            self._stats["queued"] += 1
+            future = self._executor.submit(self._run, key, kind, payload)
+            self._pending[key] = future
+            return future
+
+    def _run(self, key: str, kind: str, payload: dict) -> dict:
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["in_flight"] += 1
+        try:
+            dst = self._session.translator(
+                source_language=payload.get("source_language", ""),
+                target_language=payload.get("target_language", ""),
+            )
+            if kind == "lines":
+                result, lines = self._translate_lines(dst, payload)
+            else:
+                result, lines = self._translate_subtitle(dst, payload)
+        except (Exception, SystemExit):
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        else:
+            with self._lock:
+                self._stats["completed"] += 1
+                self._stats["lines_translated"] += lines
+                self._cache[key] = result
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+                self._pending.pop(key, None)
+
+    @staticmethod
+    def _translate_lines(dst, payload: dict) -> tuple[dict, int]:
+        lines = payload["lines"]
+        translated = []
+        for batch in batch_list(lines, payload.get("batch_size", 100)):
+            output = dst.translate(batch)
+            # Keep the source line where the model returned <CNTL> or too few lines
+            translated += [
+                output[i] if i < len(output) and "<CNTL>" not in output[i] else line
+                for i, line in enumerate(batch)
+            ]
+        return {"lines": translated}, len(lines)
+
+    @staticmethod
+    def _translate_subtitle(dst, payload: dict) -> tuple[dict, int]:
+        suffix = f".{payload.get('format', 'srt')}"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            sub_path = Path(tmp_dir) / f"input{suffix}"
+            sub_path.write_text(payload["content"], encoding="utf-8")
+            output_path = translate_subtitle(
+                sub_path,
+                dst,
+                None,
+                _SilentProgress(),
+                output_path=str(Path(tmp_dir) / f"output{suffix}"),
+                batch_size=payload.get("batch_size", 100),
+            )
+            content = output_path.read_text(encoding="utf-8")
+        return {"content": content}, len(pysubs2.SSAFile.from_string(content))
+
+    def close(self) -> None:
+        """
+        Cancel queued translations, wait for running ones and close the session.
+
+        Waiting keeps the session open until no translation uses it anymore.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._session.close()
+
+    def status(self) -> dict:
+        """Queue depth, counters and throughput since start."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached"] = len(self._cache)
+        uptime = time.time() - self._started
+        stats["uptime"] = round(uptime, 1)
+        stats["requests_per_second"] = round(stats["completed"] / uptime, 3)
+        stats["lines_per_second"] = round(stats["lines_translated"] / uptime, 3)
+        return stats
+
+
+def _validate(kind: str, body: dict) -> dict:
+    """Return the normalised payload, raising ValueError on a malformed body."""
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object.")
+    payload = {
+        "source_language": body.get("source_language", ""),
+        "target_language": body.get("target_language", ""),
+        "batch_size": body.get("batch_size", 100),
+    }
+    if not isinstance(payload["batch_size"], int) or payload["batch_size"] < 1:
+        raise ValueError("batch_size must be a positive integer.")
+    if kind == "lines":
+        lines = body.get("lines")
+        if (
+            not isinstance(lines, list)
+            or not lines
+            or not all(isinstance(l, str) and l for l in lines)
+        ):
+            raise ValueError("lines must be a non-empty list of non-empty strings.")
+        payload["lines"] = lines
+    else:
+        if not isinstance(body.get("content"), str) or not body["content"]:
+            raise ValueError("content must be the subtitle file as a string.")
+        if body.get("format", "srt") not in ("srt", "ass"):
+            raise ValueError("format must be 'srt' or 'ass'.")
+        payload["content"] = body["content"]
+        payload["format"] = body.get("format", "srt")
+    return payload
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /translate/lines     {"lines": [...], "source_language", "target_language", "batch_size"}
+    POST /translate/subtitle  {"content": "...", "format": "srt"|"ass", ...}
+    GET  /status
+    """
+
+    ROUTES = {"/translate/lines": "lines", "/translate/subtitle": "subtitle"}
+
+    @property
+    def service(self) -> TranslationService:
+        return self.server.service  # pyright: ignore
+
+    def _send(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._send(200, self.service.status())
+        else:
+            self._send(404, {"error": "Not found."})
+
+    def do_POST(self):
+        kind = self.ROUTES.get(self.path)
+        if kind is None:
+            self._send(404, {"error": "Not found."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = _validate(kind, json.loads(self.rfile.read(length) or b"null"))
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        try:
+            result = self.service.submit(kind, payload).result()
+        except CancelledError:
+            self._send(503, {"error": "Service is shutting down."})
+            return
+        except (Exception, SystemExit) as e:
+            self._send(500, {"error": f"Translation failed: {e!r}"})
+            return
+        self._send(200, result)
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    workers: int = 4,
+    session: TranslatorSession | None = None,
+) -> None:
+    """Run the translation service until interrupted, then close it and its session."""
+    server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.service = TranslationService(
+        session or TranslatorSession(), workers
+    )  # pyright: ignore
+    print(f"Translation service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()  # pyright: ignore
@@ -1,8 +1,75 @@
 import pysubs2
 import re
+from collections import defaultdict
 from math import ceil
 from pathlib import Path
+from utils.file_utils import is_subtitle_file
 from utils.deepseek import DeepSeekTranslator
+from utils.profiler import profiler
+
+# ISO 639-1 code, ISO 639-2/B and /T codes where they differ, English name
+LANGUAGES = [
+    ("ar", "ara", "arabic"),
+    ("bg", "bul", "bulgarian"),
+    ("bn", "ben", "bengali"),
+    ("bo", "tib", "bod", "tibetan"),
+    ("ca", "cat", "catalan"),
+    ("cs", "cze", "ces", "czech"),
+    ("cy", "wel", "cym", "welsh"),
+    ("da", "dan", "danish"),
+    ("de", "ger", "deu", "german"),
+    ("el", "gre", "ell", "greek"),
+    ("en", "eng", "english"),
+    ("es", "spa", "spanish"),
+    ("et", "est", "estonian"),
+    ("eu", "baq", "eus", "basque"),
+    ("fa", "per", "fas", "persian"),
+    ("fi", "fin", "finnish"),
+    ("fr", "fre", "fra", "french"),
+    ("gl", "glg", "galician"),
+    ("he", "heb", "hebrew"),
+    ("hi", "hin", "hindi"),
+    ("hr", "hrv", "croatian"),
+    ("hu", "hun", "hungarian"),
+    ("hy", "arm", "hye", "armenian"),
+    ("id", "ind", "indonesian"),
+    ("is", "ice", "isl", "icelandic"),
+    ("it", "ita", "italian"),
+    ("ja", "jpn", "japanese"),
+    ("ka", "geo", "kat", "georgian"),
+    ("km", "khm", "khmer"),
+    ("ko", "kor", "korean"),
+    ("lo", "lao"),
+    ("lt", "lit", "lithuanian"),
+    ("lv", "lav", "latvian"),
+    ("mi", "mao", "mri", "maori"),
+    ("mk", "mac", "mkd", "macedonian"),
+    ("mn", "mon", "mongolian"),
+    ("ms", "may", "msa", "malay"),
+    ("my", "bur", "mya", "burmese"),
+    ("nl", "dut", "nld", "dutch"),
+    ("no", "nor", "nb", "nob", "nn", "nno", "norwegian"),
+    ("pl", "pol", "polish"),
+    ("pt", "por", "portuguese"),
+    ("ro", "rum", "ron", "romanian"),
+    ("ru", "rus", "russian"),
+    ("sk", "slo", "slk", "slovak"),
+    ("sl", "slv", "slovenian"),
+    ("sq", "alb", "sqi", "albanian"),
+    ("sr", "srp", "serbian"),
+    ("sv", "swe", "swedish"),
+    ("ta", "tam", "tamil"),
+    ("te", "tel", "telugu"),
+    ("th", "tha", "thai"),
+    ("tl", "tgl", "fil", "tagalog", "filipino"),
+    ("tr", "tur", "turkish"),
+    ("uk", "ukr", "ukrainian"),
+    ("ur", "urd", "urdu"),
+    ("vi", "vie", "vietnamese"),
+    ("zh", "chi", "zho", "chinese"),
+]
+# Every alias mapped to the ISO 639-1 code
+_LANGUAGE_ALIASES = {alias: names[0] for names in LANGUAGES for alias in names}
 
 
 class PreprocessSubtitle:
@@ -70,6 +137,17 @@ def batch_list(lst, batch_size):
         yield lst[i : i + batch_size]
 
 
+def subtitle_batches(sub_path: Path, batch_size: int) -> list[str]:
+    """Return the user message contents translate_subtitle would send for sub_path."""
+    subtitle = pysubs2.load(str(sub_path))
+    if batch_size == 1:
+        return [PreprocessSubtitle(line.text).content for line in subtitle.events]
+    return [
+        "\\n".join(PreprocessSubtitles(batch).contents)
+        for batch in batch_list(subtitle.events, batch_size)
+    ]
+
+
 def translate_subtitle(
     sub_path: Path,
     dst: DeepSeekTranslator,
@@ -78,10 +156,11 @@ def translate_subtitle(
     output_path: str = "",
     batch_size: int = 100,
 ) -> Path:
-    assert sub_path.suffix in (".srt", ".ass"), "Unsupported subtitle format"
+    assert sub_path.suffix.lower() in (".srt", ".ass"), "Unsupported subtitle format"
     assert isinstance(batch_size, int) and batch_size > 0, "Invalid batch size"
 
-    subtitle = pysubs2.load(str(sub_path))
+    with profiler.span("subtitle.load", file=sub_path.name):
+        subtitle = pysubs2.load(str(sub_path))
 
     def update_progress(tl_type: str, text_in: str, text_out: str, i: int, total: int):
         progress.update(
@@ -92,7 +171,8 @@ def translate_subtitle(
     if batch_size == 1:
         for i, line in enumerate(subtitle.events):
             processed = PreprocessSubtitle(line.text)
-            translated = dst.translate(processed.content)
+            with profiler.span("translate", file=sub_path.name, line=i):
+                translated = dst.translate(processed.content)
             update_progress(
                 "", processed.content, translated, i + 1, len(subtitle.events)
             )
@@ -105,7 +185,8 @@ def translate_subtitle(
         for i, batch in enumerate(batch_list(subtitle.events, batch_size)):
             offset = i * batch_size
             processed_batch = PreprocessSubtitles(batch)
-            translated_texts = dst.translate(processed_batch.contents)
+            with profiler.span("translate", file=sub_path.name, batch=i):
+                translated_texts = dst.translate(processed_batch.contents)
             update_progress(
                 "Batch",
                 processed_batch.contents[0],
@@ -123,5 +204,114 @@ def translate_subtitle(
                 subtitle.events[offset + j].text = line_text
 
     output_path = output_path or str(sub_path.with_name(f"translated{sub_path.suffix}"))
-    subtitle.save(output_path)
+    with profiler.span("subtitle.save", file=sub_path.name):
+        subtitle.save(output_path)
     return Path(output_path)
+
+
+def _language_tag(sub_path: Path) -> str:
+    """Return the language part of names like episode.en.srt, or an empty string."""
+    parts = sub_path.stem.rsplit(".", 1)
+    return parts[1] if len(parts) == 2 else ""
+
+
+def _normalize_language(language: str) -> str:
+    """
+    ISO 639-1 code of a code or name like "jpn", "ja" or "ja-JP".
+
+    Unknown values are returned lowercased, so they still compare equal to
+    themselves.
+    """
+    language = language.lower().replace("_", "-")
+    return _LANGUAGE_ALIASES.get(language.split("-")[0], language)
+
+
+def _is_known_language(tag: str) -> bool:
+    return tag.lower().replace("_", "-").split("-")[0] in _LANGUAGE_ALIASES
+
+
+def _is_language(tag: str, language: str) -> bool:
+    return _normalize_language(tag) == _normalize_language(language)
+
+
+def sidecar_output_path(
+    sub_path: Path, source_language: str, target_language: str
+) -> Path:
+    """Output path next to sub_path, e.g. episode.en.srt -> episode.tha.srt."""
+    stem = sub_path.stem
+    if _is_language(_language_tag(sub_path), source_language):
+        stem = stem.rsplit(".", 1)[0]
+    return sub_path.with_name(f"{stem}.{target_language}{sub_path.suffix}")
+
+
+def find_subtitle_files(
+    directory: Path, source_language: str, target_language: str
+) -> dict[Path, list[Path]]:
+    """
+    Find sidecar subtitles still to translate, grouped by directory (series or season).
+
+    Files tagged with another language (including translations written by an
+    earlier run) and files whose output already exists are left out. Only a
+    known ISO 639 code or language name counts as a tag, so names such as
+    Show.S01E01.WEB.srt are still picked up. When several files map to the same
+    output, e.g. ep01.srt and ep01.en.srt, only one is kept, preferring the one
+    tagged with the source language.
+    """
+    candidates = {}
+    for sub_path in sorted(directory.rglob("*")):
+        if not is_subtitle_file(sub_path):
+            continue
+        tag = _language_tag(sub_path)
+        if (
+            tag
+            and not _is_language(tag, source_language)
+            and (_is_known_language(tag) or _is_language(tag, target_language))
+        ):
+            continue
+        output_path = sidecar_output_path(sub_path, source_language, target_language)
+        if output_path.exists():
+            continue
+        key = str(output_path).lower()
+        if key not in candidates or (tag and not _language_tag(candidates[key])):
+            candidates[key] = sub_path
+
+    groups = defaultdict(list)
+    for sub_path in sorted(candidates.values()):
+        groups[sub_path.parent].append(sub_path)
+    return dict(groups)
+
+
+def translate_subtitle_group(
+    sub_paths: list[Path],
+    dst: DeepSeekTranslator,
+    source_language: str,
+    target_language: str,
+    progress_task,
+    progress,
+    batch_size: int = 100,
+) -> list[Path]:
+    """
+    Translate sidecar subtitles in order with one translator, so episodes of the
+    same series share the chat history as context.
+    """
+    output_paths = []
+    for sub_path in sub_paths:
+        with profiler.span("translate_subtitle", file=sub_path.name):
+            output_paths.append(
+                translate_subtitle(
+                    sub_path,
+                    dst,
+                    progress_task,
+                    progress,
+                    output_path=str(
+                        sidecar_output_path(sub_path, source_language, target_language)
+                    ),
+                    batch_size=batch_size,
+                )
+            )
+        progress.update(
+            progress_task,
+            advance=1,
+            description=f"[blue]✔ Translated: {sub_path.name}",
+        )
+    return output_paths
@@ -1,6 +1,7 @@
 import ffmpeg
 from pathlib import Path
 from utils.file_utils import is_video_file
+from utils.profiler import profiler
 
 
 def find_video_files(directory: Path):
@@ -8,7 +9,8 @@ def find_video_files(directory: Path):
 
 
 def has_target_subtitle(video_path: Path, target_language: str) -> bool:
-    output = ffmpeg.probe(str(video_path))
+    with profiler.span("ffprobe", file=video_path.name):
+        output = ffmpeg.probe(str(video_path))
     for stream in output.get("streams", []):
         if stream.get("codec_type") == "subtitle":
             lang = stream.get("tags", {}).get("language", "")
@@ -58,18 +60,24 @@ def embed_subtitle(
         output_ffmpeg = output_ffmpeg.global_args(
             meta_key, f"{meta_field}={meta_value}"
         )
-    output_ffmpeg.run(quiet=True, overwrite_output=True)
+    with profiler.span(
+        "embed_subtitle", file=video_path.name, tracks=len(subtitle_info)
+    ):
+        output_ffmpeg.run(quiet=True, overwrite_output=True)
 
 
 def extract_subtitle_stream(
     video_path: Path, output_path: Path | str, stream_index: int
 ) -> bool:
     try:
-        (
-            ffmpeg.input(str(video_path))
-            .output(str(output_path), map=f"0:{stream_index}")
-            .run(quiet=True, overwrite_output=True)
-        )
+        with profiler.span(
+            "extract_subtitle_stream", file=video_path.name, track=stream_index
+        ):
+            (
+                ffmpeg.input(str(video_path))
+                .output(str(output_path), map=f"0:{stream_index}")
+                .run(quiet=True, overwrite_output=True)
+            )
     except ffmpeg.Error as e:
         print(f"Error extracting subtitle stream: {e}")
         return False
@@ -77,10 +85,11 @@ def extract_subtitle_stream(
 
 
 def extract_subtitles(
-    video_path: Path, target_lang="english"
+    video_path: Path, target_lang="english", output_dir: Path | None = None
 ) -> list[tuple[Path, str]]:
     assert isinstance(video_path, Path), "video_path must be Path object"
-    output = ffmpeg.probe(str(video_path))
+    with profiler.span("ffprobe", file=video_path.name):
+        output = ffmpeg.probe(str(video_path))
     output_sub_paths = []
     for stream in output.get("streams", []):
         if stream.get("codec_type") == "subtitle":
@@ -116,7 +125,11 @@ def extract_subtitles(
                 else:
                     print(f"Unsupported subtitle codec: {codec_name}")
                     continue
-                output_sub_path = video_path.with_name(output_sub_path)
+                output_sub_path = (
+                    output_dir / output_sub_path
+                    if output_dir
+                    else video_path.with_name(output_sub_path)
+                )
                 if extract_subtitle_stream(video_path, output_sub_path, stream_index):
                     output_sub_paths.append(
                         (
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseStore:
+    """
+    Lock-file based work claiming for several workers sharing one library.
+
+    Every video maps to a `<key>.lock` file in the lease directory, created
+    atomically with O_EXCL so only one worker can hold it. The holder keeps
+    the lease alive by touching the file from a heartbeat thread; a lock whose
+    mtime is older than the TTL belongs to a dead worker and may be reclaimed.
+    Finished videos get a `<key>.done` marker so no worker picks them up again.
+
+    Expiry compares the shared filesystem's mtime with the local clock, so the
+    TTL must comfortably exceed the clock skew between hosts.
+    """
+
+    def __init__(
+        self,
+        lease_dir: Path,
+        root: Path,
+        worker_id: str = "",
+        ttl: float = 300.0,
+    ):
+        """
+        Args:
+            lease_dir (Path): Directory on the shared filesystem holding the leases.
+            root (Path): Library root, keys are derived from paths relative to it.
+            worker_id (str): Identifier written into the locks (default: host-pid).
+            ttl (float): Seconds without heartbeat after which a lease is stale.
+        """
+        assert ttl > 0, "ttl must be positive"
+        self.lease_dir = Path(lease_dir)
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        self.root = Path(root)
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        self._held: dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _key(self, video_path: Path) -> str:
+        try:
+            name = Path(video_path).relative_to(self.root).as_posix()
+        except ValueError:
+            name = Path(video_path).as_posix()
+        return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+    def _lock_path(self, video_path: Path) -> Path:
+        return self.lease_dir / f"{self._key(video_path)}.lock"
+
+    def _done_path(self, video_path: Path) -> Path:
+        return self.lease_dir / f"{self._key(video_path)}.done"
+
+    def is_done(self, video_path: Path) -> bool:
+        return self._done_path(video_path).exists()
+
+    def _create_lock(self, lock_path: Path, video_path: Path) -> bool:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {
+                    "worker_id": self.worker_id,
+                    "path": str(video_path),
+                    "claimed_at": time.time(),
+                },
+                f,
+            )
+        return True
+
+    def _is_stale(self, path: Path) -> bool:
+        try:
+            return time.time() - path.stat().st_mtime > self.ttl
+        except FileNotFoundError:
+            return False
+
+    def _read_lock(self, path: Path) -> bytes | None:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _break_stale_lock(self, lock_path: Path) -> None:
+        """
+        Move a stale lock aside; rename is atomic so only one worker wins.
+
+        The aside copy is only discarded if it is still the stale lease read
+        before the rename. If its owner heartbeated in between, or the content
+        changed, the lease is put back with O_EXCL, so a lock created meanwhile
+        by another worker is never overwritten. No hard links are needed, which
+        SMB/CIFS mounts often lack. An owner that heartbeats while its lock is
+        moved aside gives the video up, and the restored lock then expires.
+        """
+        stale_content = self._read_lock(lock_path)
+        if stale_content is None or not self._is_stale(lock_path):
+            return
+        aside = lock_path.with_name(f"{lock_path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(lock_path, aside)
+        except FileNotFoundError:
+            return
+        if self._read_lock(aside) != stale_content or not self._is_stale(aside):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # Someone else claimed it meanwhile, the lock file decides the owner
+                pass
+            else:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self._read_lock(aside) or b"")
+        aside.unlink(missing_ok=True)
+
+    def claim(self, video_path: Path) -> bool:
+        """
+        Try to take the lease on video_path.
+
+        Returns:
+            bool: True if this worker now holds the lease, False if the video is
+            done or held by a live worker.
+        """
+        if self.is_done(video_path):
+            return False
+        lock_path = self._lock_path(video_path)
+        if not self._create_lock(lock_path, video_path):
+            self._break_stale_lock(lock_path)
+            if not self._create_lock(lock_path, video_path):
+                return False
+        with self._lock:
+            self._held[str(video_path)] = lock_path
+        return True
+
+    def _owns(self, lock_path: Path) -> bool:
+        try:
+            with open(lock_path, "r") as f:
+                return json.load(f).get("worker_id") == self.worker_id
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+    def holds(self, video_path: Path) -> bool:
+        """True while the lock on video_path still exists and names this worker."""
+        with self._lock:
+            lock_path = self._held.get(str(video_path))
+        return lock_path is not None and self._owns(lock_path)
+
+    def release(self, video_path: Path, done: bool = False) -> None:
+        """
+        Drop the lease, marking the video as finished when done is True.
+
+        Nothing is marked or removed if the lease was lost to another worker.
+        """
+        with self._lock:
+            lock_path = self._held.pop(str(video_path), None)
+        if lock_path is None or not self._owns(lock_path):
+            return
+        if done:
+            self._done_path(video_path).write_text(self.worker_id)
+        lock_path.unlink(missing_ok=True)
+
+    def heartbeat(self) -> None:
+        """Refresh the mtime of every held lease."""
+        with self._lock:
+            held = list(self._held.items())
+        for video_path, lock_path in held:
+            if self._owns(lock_path):
+                try:
+                    os.utime(lock_path)
+                    continue
+                except FileNotFoundError:
+                    pass
+            print(f"Lost lease on {video_path}")
+            with self._lock:
+                self._held.pop(video_path, None)
+
+    def _run_heartbeat(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            self.heartbeat()
+
+    def start(self) -> None:
+        """Start the background heartbeat thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_heartbeat, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop heartbeating and give back any lease still held."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            held = list(self._held)
+        for video_path in held:
+            self.release(Path(video_path))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()